@@ -16,7 +16,6 @@
 # tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
 
 from collections.abc import Iterator
-from os.path import abspath, relpath
 
 from . import classifier, common_data, locator
 from .common_data import APPLIANCE_ROOT
@@ -43,10 +42,5 @@ def yield_appliance_items() -> Iterator[classifier.Item]:
     """Yield everything 'lintable'"""
 
     yield from common_data.iter_packages()
-    for path in locator.locator(APPLIANCE_ROOT, False):
-        yield classifier.FileItem(
-            value=path,
-            _tags={},
-            relpath=relpath(path, start=APPLIANCE_ROOT),
-            abspath=abspath(path),
-        )
+    for path, file_stat in locator.locate(APPLIANCE_ROOT, False):
+        yield classifier.FileItem.from_path(path, APPLIANCE_ROOT, file_stat)
@@ -22,56 +22,423 @@ Finds packages based on files they provide, including those not
 installed
 """
 
+import bz2
+import fcntl
+import gzip
+import json
+import lzma
+import mmap
+import os
+import re
 import subprocess
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from glob import glob
+from logging import getLogger
+from os.path import exists, isfile, join
 
+from .cache import CACHE_DIR
+from .tools import (  # noqa: F401 - re-exported for existing modules
+    is_in_path,
+    is_installed,
+    register_tool,
+)
 
-def is_in_path(name: str) -> bool:
-    """Check if a given name is in the path"""
-    in_path = subprocess.run(["/usr/bin/which", name], capture_output=True)
-    return in_path.returncode == 0
+CONTENTS_GLOB = "/var/lib/apt/lists/*Contents-*"
+"apt-file's local Contents files (as downloaded by `apt-file update`)"
 
+APT_HELPER = "/usr/lib/apt/apt-helper"
 
-def is_installed(package_name: str) -> bool:
-    """Check if a given package is installed on the HOST system (tkldev)"""
-    pkg_installed = subprocess.run(
-        [
-            "/usr/bin/dpkg-query",
-            "-W",
-            "--showformat='${Status}'",
-            package_name,
-        ],
-        capture_output=True,
+CONTENTS_INDEX = join(CACHE_DIR, "apt-contents.idx")
+
+QUERY_CACHE = join(CACHE_DIR, "apt-file-queries.jsonl")
+
+APT_FILE_REGEX_MAX = 32 * 1024
+"longest combined regex passed to a single `apt-file search`"
+
+_REGEX_META = set(".^$*+?{}[]\\|()")
+_REGEX_QUANTIFIERS = set("*?{")
+
+logger = getLogger(__name__)
+
+
+APT_FILE = register_tool("apt-file", "apt-file")
+
+
+def _contents_files() -> list[str]:
+    return sorted(
+        path
+        for path in glob(CONTENTS_GLOB)
+        if isfile(path)
+        and "Contents-udeb" not in path
+        and not path.endswith(".diff_Index")
     )
-    return pkg_installed.returncode != 0
 
 
-HAS_APT_FILE: bool = is_installed("apt-file")
+def _contents_stamp(paths: list[str]) -> list[list]:
+    stamp = []
+    for path in paths:
+        st = os.stat(path)
+        stamp.append([path, st.st_mtime_ns, st.st_size])
+    return stamp
+
+
+def _read_contents(path: str) -> Iterator[bytes]:
+    """Yield lines of a (possibly compressed) Contents file"""
+    if exists(APT_HELPER):
+        # apt-helper understands every compression apt does (including lz4)
+        with subprocess.Popen(
+            [APT_HELPER, "cat-file", path], stdout=subprocess.PIPE
+        ) as proc:
+            assert proc.stdout is not None
+            yield from proc.stdout
+        return
+    openers = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+    opener = openers.get(os.path.splitext(path)[1], open)
+    with opener(path, "rb") as fob:
+        yield from fob
+
+
+def _build_contents_index(paths: list[str], index_path: str) -> None:
+    """
+    Build sorted index of every path in Contents files
+
+    Each line of the index is `/path<TAB>section/pkg,section/pkg`, sorted
+    bytewise by path. Sorting is done by sort(1) so memory use is bounded
+    regardless of Contents size
+    """
+    logger.info("building apt Contents index from %d files", len(paths))
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as out:
+        sorter = subprocess.Popen(
+            ["sort", "-t", "\t", "-k1,1", "-s"],
+            stdin=subprocess.PIPE,
+            stdout=out,
+            env={**os.environ, "LC_ALL": "C"},
+        )
+        assert sorter.stdin is not None
+        for contents in paths:
+            for line in _read_contents(contents):
+                parts = line.rstrip().rsplit(None, 1)
+                if len(parts) != 2 or parts[0] == b"FILE":
+                    continue
+                sorter.stdin.write(b"/" + parts[0] + b"\t" + parts[1] + b"\n")
+        sorter.stdin.close()
+        if sorter.wait() != 0:
+            os.unlink(tmp_path)
+            error_message = "sort failed while building apt Contents index"
+            raise OSError(error_message)
+    os.replace(tmp_path, index_path)
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Return the literal text every match of (unescaped) regex begins with"""
+    prefix = ""
+    for i, char in enumerate(pattern):
+        if char in _REGEX_META:
+            break
+        if i + 1 < len(pattern) and pattern[i + 1] in _REGEX_QUANTIFIERS:
+            # quantifier makes this character optional
+            break
+        prefix += char
+    return prefix
+
+
+class ContentsIndex:
+    """
+    Memory mapped, sorted index of apt Contents files
+
+    Lookups binary search the index for the literal prefix of a pattern,
+    only lines sharing that prefix are matched against the pattern itself
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as fob:
+            if os.fstat(fob.fileno()).st_size == 0:
+                self._map: mmap.mmap | bytes = b""
+            else:
+                self._map = mmap.mmap(
+                    fob.fileno(), 0, access=mmap.ACCESS_READ
+                )
+
+    def _line_start(self, pos: int) -> int:
+        return self._map.rfind(b"\n", 0, pos) + 1
+
+    def _lower_bound(self, key: bytes) -> int:
+        """Return offset of first line with a path >= key"""
+        lo, hi = 0, len(self._map)
+        while lo < hi:
+            start = self._line_start((lo + hi) // 2)
+            end = self._map.find(b"\t", start)
+            if self._map[start:end] < key:
+                lo = self._map.find(b"\n", end) + 1
+            else:
+                hi = start
+        return lo
+
+    def iter_prefix(self, prefix: str) -> Iterator[tuple[str, list[str]]]:
+        """Yield (path, packages) for every path beginning with prefix"""
+        key = os.fsencode(prefix)
+        pos = self._lower_bound(key)
+        while pos < len(self._map):
+            end = self._map.find(b"\n", pos)
+            if end == -1:
+                end = len(self._map)
+            path, _, locations = self._map[pos:end].partition(b"\t")
+            if not path.startswith(key):
+                break
+            packages = [
+                loc.rsplit(b"/", 1)[-1].decode()
+                for loc in locations.split(b",")
+            ]
+            yield os.fsdecode(path), packages
+            pos = end + 1
+
+    def search(self, pattern: str) -> list[str] | None:
+        """
+        Return packages providing a path matching regex pattern
+
+        Returns None if pattern can't be looked up efficiently (must begin
+        with a literal absolute path)
+        """
+        prefix = _literal_prefix(pattern)
+        if not prefix.startswith("/") or len(prefix) < 2:
+            return None
+        regex = re.compile(pattern)
+        packages: set[str] = set()
+        for path, path_packages in self.iter_prefix(prefix):
+            if regex.match(path):
+                packages.update(path_packages)
+        return sorted(packages)
+
+
+STAMP_CHECK_INTERVAL = 60.0
+"seconds between checks for changes to Contents files in a single process"
+
+_STAMP: list[list] | None = None
+_STAMP_CHECKED = 0.0
+_INDEX: ContentsIndex | None = None
+_INDEX_STAMP: list[list] | None = None
+_QUERIES: dict[str, list[str]] | None = None
+_QUERIES_STAMP: list[list] | None = None
+_LOCK = threading.RLock()
+
+
+def _current_stamp() -> list[list]:
+    """
+    Return size & mtime of all Contents files
+
+    Only re-checked every STAMP_CHECK_INTERVAL seconds, so long running
+    processes (e.g. watch mode) notice `apt-file update`
+    """
+    global _STAMP, _STAMP_CHECKED
+    with _LOCK:
+        now = time.monotonic()
+        if _STAMP is None or now - _STAMP_CHECKED > STAMP_CHECK_INTERVAL:
+            _STAMP = _contents_stamp(_contents_files())
+            _STAMP_CHECKED = now
+        return _STAMP
+
+
+def get_contents_index() -> ContentsIndex | None:
+    """
+    Return index of apt-file's Contents files, building it if required
+
+    The index is rebuilt whenever the Contents files change (e.g. after
+    `apt-file update`). Returns None if there are no Contents files or the
+    index can't be built
+    """
+    global _INDEX, _INDEX_STAMP
+    with _LOCK:
+        stamp = _current_stamp()
+        if stamp == _INDEX_STAMP:
+            return _INDEX
+        _INDEX = None
+        _INDEX_STAMP = stamp
+        if not stamp:
+            return None
+        stamp_path = CONTENTS_INDEX + ".stamp"
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(CONTENTS_INDEX + ".lock", "w") as lock:
+                # other processes may be building the same index
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    with open(stamp_path, "r") as fob:
+                        current = json.load(fob) == stamp
+                except (OSError, ValueError):
+                    current = False
+                if not current or not exists(CONTENTS_INDEX):
+                    _build_contents_index(
+                        [path for path, *_ in stamp], CONTENTS_INDEX
+                    )
+                    with open(stamp_path, "w") as fob:
+                        json.dump(stamp, fob)
+            _INDEX = ContentsIndex(CONTENTS_INDEX)
+        except OSError:
+            logger.warning(
+                "couldn't build apt Contents index, using apt-file",
+                exc_info=True,
+            )
+        return _INDEX
+
+
+def _get_queries() -> dict[str, list[str]]:
+    """
+    Return results of previous queries
+
+    Results are persisted in QUERY_CACHE, one json line per query following
+    a header line holding the Contents stamp they were made against. If the
+    stamp no longer matches, every previous result is discarded
+    """
+    global _QUERIES, _QUERIES_STAMP
+    with _LOCK:
+        stamp = _current_stamp()
+        if _QUERIES is not None and stamp == _QUERIES_STAMP:
+            return _QUERIES
+        _QUERIES = {}
+        _QUERIES_STAMP = stamp
+        try:
+            with open(QUERY_CACHE, "r") as fob:
+                if json.loads(fob.readline()) != stamp:
+                    raise ValueError
+                for line in fob:
+                    try:
+                        pattern, packages = json.loads(line)
+                    except ValueError:
+                        # partially written by a process that died
+                        continue
+                    _QUERIES[pattern] = packages
+        except (OSError, ValueError):
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp_path = f"{QUERY_CACHE}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as fob:
+                    fob.write(json.dumps(stamp) + "\n")
+                os.replace(tmp_path, QUERY_CACHE)
+            except OSError:
+                logger.debug("couldn't reset apt-file query cache")
+        return _QUERIES
+
+
+def _remember_queries(results: dict[str, list[str]]) -> None:
+    """Persist query results, appending is safe across processes"""
+    try:
+        with open(QUERY_CACHE, "a") as fob:
+            fob.writelines(
+                json.dumps([pattern, packages]) + "\n"
+                for pattern, packages in results.items()
+            )
+    except OSError:
+        logger.debug("couldn't save apt-file query results")
+
+
+def _apt_file_search(patterns: list[str]) -> dict[str, list[str]]:
+    """
+    Search for many patterns with apt-file
+
+    Patterns are combined into as few regexes as possible, each path found is
+    then attributed to the pattern(s) it matches
+    """
+    if not APT_FILE.is_available():
+        logger.warning("apt-file isn't installed, can't find packages")
+        return {}
+    results: dict[str, set[str]] = {pattern: set() for pattern in patterns}
+    compiled = [(pattern, re.compile(pattern)) for pattern in patterns]
+    chunks: list[list[str]] = [[]]
+    length = 0
+    for pattern in patterns:
+        if chunks[-1] and length + len(pattern) > APT_FILE_REGEX_MAX:
+            chunks.append([])
+            length = 0
+        chunks[-1].append(pattern)
+        length += len(pattern) + 5
+    for chunk in chunks:
+        ret = subprocess.run(
+            [
+                APT_FILE.path or "/usr/bin/apt-file",
+                "search",
+                "-x",
+                "|".join(f"(?:{pattern})" for pattern in chunk),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if ret.returncode != 0:
+            continue
+        for line in ret.stdout.splitlines():
+            package, sep, path = line.partition(": ")
+            if not sep:
+                continue
+            for pattern, regex in compiled:
+                if regex.search(path):
+                    results[pattern].add(package)
+    return {pattern: sorted(packages) for pattern, packages in results.items()}
+
+
+def _find_packages_by_files(patterns: list[str]) -> dict[str, list[str]]:
+    results: dict[str, list[str]] = {}
+    remaining = []
+    index = get_contents_index()
+    for pattern in patterns:
+        packages = index.search(pattern) if index is not None else None
+        if packages is None:
+            remaining.append(pattern)
+        else:
+            results[pattern] = packages
+    if remaining:
+        results.update(_apt_file_search(remaining))
+    return results
+
+
+def find_packages_by_files(paths: Iterable[str]) -> dict[str, list[str]]:
+    """
+    Return packages that provide files at many paths at once
+
+    Like `find_package_by_file`, but paths which aren't cached are resolved
+    together in as few apt-file searches as possible. Returns a dict mapping
+    each path to the packages providing it
+    """
+    queries = _get_queries()
+    results: dict[str, list[str]] = {}
+    missing: list[str] = []
+    with _LOCK:
+        for path in paths:
+            if path in queries:
+                results[path] = queries[path][:]
+            elif path not in results:
+                missing.append(path)
+                results[path] = []
+    if missing:
+        found = _find_packages_by_files(missing)
+        with _LOCK:
+            queries.update(found)
+            _remember_queries(found)
+        for path, packages in found.items():
+            results[path] = packages[:]
+    return results
 
 
 def find_package_by_file(path: str) -> list[str]:
-    """Return a list of packages that provide a file at a given path"""
-
-    ret = subprocess.run(
-        [
-            "/usr/bin/apt-file",
-            "search",
-            "--package-only",
-            "-x",
-            path,
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if ret.returncode != 0:
-        return []
-    return ret.stdout.strip().splitlines()
+    """
+    Return a list of packages that provide a file at a given path
+
+    path is a regex (as with `apt-file search -x`). Looked up in the local
+    Contents index when possible, otherwise apt-file is used. Results
+    (including empty ones) are cached, in memory and on disk, until the
+    Contents files change
+    """
+    return find_packages_by_files([path])[path]
+
+
+def _python_package_pattern(package_name: str) -> str:
+    return f"/usr/lib/python3/dist-packages/{package_name}(\\.py)?"
 
 
 def find_python_package(package_name: str) -> list[str]:
     """Return a list of packages that provide a given python module"""
-    return find_package_by_file(
-        f"/usr/lib/python3/dist-packages/{package_name}(\\.py)?"
-    )
+    return find_package_by_file(_python_package_pattern(package_name))
 
 
 def find_python_package_from_import(module_str: str) -> list[str]:
@@ -82,9 +449,32 @@ def find_python_package_from_import(module_str: str) -> list[str]:
     be several modules deep (e.g. `foo.bar.baz`), attempts to find most
     specific python package provider
     """
-    out = find_python_package(module_str.replace(".", "/"))
-    while "." in module_str and not out:
-        module_str = module_str.rsplit(".", 1)[0]
-        out = find_python_package(module_str.replace(".", "/"))
+    return find_python_packages_from_imports([module_str])[module_str]
 
-    return out
+
+def find_python_packages_from_imports(
+    module_strs: Iterable[str],
+) -> dict[str, list[str]]:
+    """
+    Find python packages for many import names at once
+
+    Same as `find_python_package_from_import`, but every module is looked up
+    together, as are each of their parents in turn
+    """
+    results: dict[str, list[str]] = {}
+    pending = {module_str: module_str for module_str in module_strs}
+    while pending:
+        patterns = {
+            module_str: _python_package_pattern(module.replace(".", "/"))
+            for module_str, module in pending.items()
+        }
+        found = find_packages_by_files(patterns.values())
+        next_pending = {}
+        for module_str, module in pending.items():
+            packages = found[patterns[module_str]]
+            if not packages and "." in module:
+                next_pending[module_str] = module.rsplit(".", 1)[0]
+            else:
+                results[module_str] = packages
+        pending = next_pending
+    return results
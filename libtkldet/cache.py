@@ -0,0 +1,341 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Persistent cache of lint results
+
+Results are keyed by file content, linter, and whatever the linter reports as
+its `cache_key` (tool version, configuration, etc.) so files which haven't
+changed since the last run don't need to be linted again
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from os.path import expanduser, join
+
+from .classifier import FileItem
+from .linter import Linter
+from .report import (
+    FailureReport,
+    FileReport,
+    Replacement,
+    Report,
+    ReportLevel,
+)
+
+CACHE_DIR = join(
+    os.getenv("XDG_CACHE_HOME", expanduser("~/.cache")), "tkldev-detective"
+)
+
+CACHE_MAX_SIZE = 64 * 1024 * 1024
+"once results exceed this many bytes, least recently used are evicted"
+
+_SCHEMA_VERSION = 1
+
+logger = getLogger(__name__)
+
+
+def _encode_span(
+    value: int | tuple[int, int] | None,
+) -> int | list[int] | None:
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def _decode_span(
+    value: int | list[int] | None,
+) -> int | tuple[int, int] | None:
+    if isinstance(value, list):
+        return (value[0], value[1])
+    return value
+
+
+def report_to_dict(report: Report) -> dict:
+    """Convert report to a json serializable dict (without its item)"""
+    fix: str | dict | None = report.fix
+    if isinstance(report.fix, Replacement):
+        fix = {
+            "begin_line": report.fix.begin_line,
+            "end_line": report.fix.end_line,
+            "replacement": list(report.fix.replacement),
+        }
+    data = {
+        "type": report.__class__.__name__,
+        "location_metadata": report.location_metadata,
+        "message": report.message,
+        "fix": fix,
+        "source": report.source,
+        "level": report.level.name,
+        "raw": report.raw,
+    }
+    if isinstance(report, FileReport):
+        data["line"] = _encode_span(report.line)
+        data["column"] = _encode_span(report.column)
+    return data
+
+
+def report_from_dict(item: FileItem, data: dict) -> Report:
+    """Recreate report from `report_to_dict` output for a given item"""
+    fix = data["fix"]
+    if isinstance(fix, dict):
+        fix = Replacement(**fix)
+    kwargs = {
+        "item": item,
+        "location_metadata": data["location_metadata"],
+        "message": data["message"],
+        "fix": fix,
+        "source": data["source"],
+        "level": ReportLevel[data["level"]],
+        "raw": data["raw"],
+    }
+    if data["type"] == "FileReport":
+        return FileReport(
+            **kwargs,
+            line=_decode_span(data["line"]),
+            column=_decode_span(data["column"]),
+        )
+    return Report(**kwargs)
+
+
+@dataclass
+class CacheStats:
+    """Summary of cache contents"""
+
+    path: str
+    entries: int
+    files: int
+    size: int
+    max_size: int
+
+
+class ResultCache:
+    """
+    On disk cache of lint results
+
+    Safe to use from multiple threads. Call `close` once finished, which also
+    evicts least recently used results if the cache has grown too large
+    """
+
+    def __init__(
+        self, cache_dir: str = CACHE_DIR, max_size: int = CACHE_MAX_SIZE
+    ) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = join(cache_dir, "results.sqlite3")
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._linter_keys: dict[str, str | None] = {}
+        # other processes (e.g. fleet workers, watch mode) may share the
+        # database, so every write is committed straight away (autocommit)
+        # rather than holding the write lock until closed
+        self._db = sqlite3.connect(
+            self.path,
+            timeout=60,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # with WAL, commits only need to sync at checkpoints
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                size INTEGER,
+                digest TEXT
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                data TEXT,
+                size INTEGER,
+                last_used REAL
+            );
+            """
+        )
+        self._db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def _file_digest(self, item: FileItem) -> str | None:
+        """
+        Return content digest of file
+
+        If size & mtime are unchanged since last time the file was hashed, the
+        previous digest is reused without reading the file
+        """
+        path = item.abspath
+        file_stat = item.stat
+        if file_stat is None:
+            return None
+        if file_stat.is_symlink:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            mtime_ns, size = st.st_mtime_ns, st.st_size
+        else:
+            mtime_ns, size = file_stat.mtime_ns, file_stat.size
+        with self._lock:
+            row = self._db.execute(
+                "SELECT mtime_ns, size, digest FROM files WHERE path = ?",
+                (path,),
+            ).fetchone()
+        if row is not None and row[:2] == (mtime_ns, size):
+            return row[2]
+        # read through the content cache, as the file is usually about to be
+        # linted and its reports shown
+        content = item.content
+        if content is None:
+            return None
+        digest = hashlib.sha256(content.data).hexdigest()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (path, mtime_ns, size, digest),
+            )
+        return digest
+
+    def _key(self, linter: Linter, item: FileItem) -> str | None:
+        name = linter.__class__.__name__
+        if name not in self._linter_keys:
+            self._linter_keys[name] = linter.cache_key()
+        linter_key = self._linter_keys[name]
+        if linter_key is None:
+            return None
+        digest = self._file_digest(item)
+        if digest is None:
+            return None
+        # path is part of the key, as some lints (and report messages)
+        # depend on where the file is
+        return hashlib.sha256(
+            "\0".join(
+                [
+                    name,
+                    linter_key,
+                    linter.item_cache_key(item),
+                    item.abspath,
+                    digest,
+                ]
+            ).encode()
+        ).hexdigest()
+
+    def get(self, linter: Linter, item: FileItem) -> list[Report] | None:
+        """Return cached reports of linter for item, None if not cached"""
+        key = self._key(linter, item)
+        if key is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return [report_from_dict(item, data) for data in json.loads(row[0])]
+
+    def put(
+        self, linter: Linter, item: FileItem, reports: list[Report]
+    ) -> None:
+        """
+        Store reports of linter for item, if linter can be cached
+
+        Nothing is stored if any report is a `FailureReport`, so the item is
+        checked again next time
+        """
+        if any(isinstance(report, FailureReport) for report in reports):
+            return
+        key = self._key(linter, item)
+        if key is None:
+            return
+        data = json.dumps([report_to_dict(report) for report in reports])
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+
+    def evict(self) -> None:
+        """Remove least recently used results until under `max_size`"""
+        with self._lock:
+            (total,) = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            if total <= self.max_size:
+                return
+            rows = self._db.execute(
+                "SELECT key, size FROM results ORDER BY last_used"
+            ).fetchall()
+            evicted = []
+            for key, size in rows:
+                if total <= self.max_size:
+                    break
+                evicted.append((key,))
+                total -= size
+            with self._db:
+                self._db.execute("BEGIN IMMEDIATE")
+                self._db.executemany(
+                    "DELETE FROM results WHERE key = ?", evicted
+                )
+            logger.debug("evicted %d cached results", len(evicted))
+
+    def stats(self) -> CacheStats:
+        """Return summary of cache contents"""
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            (files,) = self._db.execute(
+                "SELECT COUNT(*) FROM files"
+            ).fetchone()
+        return CacheStats(self.path, entries, files, size, self.max_size)
+
+    def clear(self) -> None:
+        """Remove everything from the cache"""
+        with self._lock:
+            with self._db:
+                self._db.execute("BEGIN IMMEDIATE")
+                self._db.execute("DELETE FROM results")
+                self._db.execute("DELETE FROM files")
+            self._db.execute("VACUUM")
+
+    def close(self) -> None:
+        """Evict old results, save & close cache"""
+        self.evict()
+        with self._lock:
+            self._db.close()
+
+
+def open_cache(cache_dir: str = CACHE_DIR) -> ResultCache | None:
+    """
+    Open the result cache, None (with a warning) if it can't be used
+
+    e.g. if the cache directory isn't writable, linting works just as well
+    without a cache, only slower
+    """
+    try:
+        return ResultCache(cache_dir)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("not caching results, cache unavailable: %s", e)
+        return None
@@ -21,11 +21,19 @@ Encapsulates "Classifier"s & the "Item"s they operate on
 code here provides ability to "classify" different files
 """
 
+import sys
 from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
-from os.path import dirname
+from os.path import abspath, dirname, relpath
 from typing import ClassVar, cast
 
+from . import metrics
+from .file_cache import FileContent, get_content, get_head
+from .file_util import FileStat
+
+_TAG_SETS: dict[frozenset[str], frozenset[str]] = {}
+"every distinct set of tags, so items with the same tags share one set"
+
 
 @dataclass(frozen=True)
 class Item:
@@ -36,7 +44,7 @@ class Item:
     value is dependant on type of "thing"
     """
 
-    __slots__ = ["value", "_tags"]
+    __slots__ = ["value", "_tags", "_frozen_tags"]
 
     value: str
     """context dependant value, either the thing being classified itself or
@@ -52,26 +60,63 @@ class Item:
         for tags in self._tags.values():
             yield from tags
 
+    @property
+    def tag_set(self) -> frozenset[str]:
+        """
+        All tags as a set
+
+        Once classification is finished (see `freeze_tags`) this is shared
+        between all items with the same tags
+        """
+        try:
+            return self._frozen_tags
+        except AttributeError:
+            return frozenset(self.tags)
+
+    def freeze_tags(self) -> frozenset[str]:
+        """
+        Intern tags, called once classification is finished
+
+        Tags may still be added afterwards, but doing so is slow
+        """
+        tag_set = frozenset(sys.intern(tag) for tag in self.tags)
+        tag_set = _TAG_SETS.setdefault(tag_set, tag_set)
+        object.__setattr__(self, "_frozen_tags", tag_set)
+        return tag_set
+
     def add_tags(self, classifier: "Classifier", tags: Iterable[str]) -> None:
         """Add tags to an item"""
         name = classifier.__class__.__name__
         if name not in self._tags:
             self._tags[name] = set()
         self._tags[name].update(tags)
+        if hasattr(self, "_frozen_tags"):
+            object.__delattr__(self, "_frozen_tags")
+
+    def is_tagged_by(self, classifier: "Classifier") -> bool:
+        """Check if a given classifier added any tags to this item"""
+        return bool(self._tags.get(classifier.__class__.__name__))
+
+    def _current_tags(self) -> Iterable[str]:
+        # while classifying, scanning tags is cheaper than building a set
+        try:
+            return self._frozen_tags
+        except AttributeError:
+            return self.tags
 
     def has_tag(self, tag: str) -> bool:
         """Check if item contains a given tag"""
-        return tag in self.tags
+        return tag in self._current_tags()
 
     def has_tag_type(self, tag_type: str) -> bool:
         """Check if item contains a variant tag of a given type"""
         check = tag_type + ":"
-        return any(tag.startswith(check) for tag in self.tags)
+        return any(tag.startswith(check) for tag in self._current_tags())
 
     def tags_with_type(self, tag_type: str) -> Iterator[str]:
         """Return all tags with a variant tag of a given type"""
         check = tag_type + ":"
-        return filter(lambda tag: tag.startswith(check), self.tags)
+        return filter(lambda tag: tag.startswith(check), self._current_tags())
 
     def pretty_print(self) -> None:
         """Show item value as well as tags"""
@@ -88,7 +133,7 @@ class FileItem(Item):
     value is the raw path found by the locator
     """
 
-    __slots__ = ["relpath", "abspath"]
+    __slots__ = ["relpath", "abspath", "_stat"]
 
     relpath: str
     """path relative to the appliance root, use this when inspecting the
@@ -98,6 +143,54 @@ class FileItem(Item):
     """absolute path to file, use this when inspecting the file the path points
     to"""
 
+    @classmethod
+    def from_path(
+        cls, path: str, root: str, file_stat: FileStat | None = None
+    ) -> "FileItem":
+        """Create item for path inside root, optionally with known stat"""
+        item = cls(
+            value=path,
+            _tags={},
+            relpath=relpath(path, start=root),
+            abspath=abspath(path),
+        )
+        if file_stat is not None:
+            object.__setattr__(item, "_stat", file_stat)
+        return item
+
+    @property
+    def stat(self) -> FileStat | None:
+        """
+        Stat information of file, None if it doesn't exist
+
+        Usually gathered by the locator, otherwise looked up (once)
+        """
+        try:
+            return self._stat
+        except AttributeError:
+            pass
+        file_stat = FileStat.from_path(self.abspath)
+        if file_stat is not None:
+            object.__setattr__(self, "_stat", file_stat)
+        return file_stat
+
+    @property
+    def content(self) -> FileContent | None:
+        """
+        Contents of file, None if it can't be read
+
+        Shared with everything else reading the file during this run
+        """
+        return get_content(self.abspath, self.stat)
+
+    def head(self, size: int) -> bytes | None:
+        """
+        First `size` bytes of file, None if it can't be read
+
+        Doesn't read (or cache) the rest of the file
+        """
+        return get_head(self.abspath, size, self.stat)
+
 
 @dataclass(frozen=True)
 class PackageItem(Item):
@@ -223,3 +316,86 @@ def get_weighted_classifiers() -> list[Classifier]:
         (c() for c in _CLASSIFIERS),
         key=lambda x: (x.WEIGHT, x.__class__.__name__),
     )
+
+
+def _is_path_classifier(classifier: Classifier) -> bool:
+    """Check if classifier only matches paths (and can be indexed)"""
+    if isinstance(classifier, ExactPathClassifier):
+        return type(classifier).classify is ExactPathClassifier.classify
+    if isinstance(classifier, SubdirClassifier):
+        return type(classifier).classify is SubdirClassifier.classify
+    return False
+
+
+class PathRuleClassifier(FileClassifier):
+    """
+    Applies many path classifiers at once
+
+    Exact paths and parent directories are looked up in dicts, recursive
+    subdirectories in a trie of path components, so each item costs a lookup
+    per directory in its path no matter how many path classifiers there are.
+    Tags are still added on behalf of the original classifiers
+    """
+
+    def __init__(self, classifiers: list[Classifier]) -> None:
+        self.classifiers = classifiers
+        self._exact: dict[str, list[int]] = {}
+        self._parent: dict[str, list[int]] = {}
+        self._tree: dict = {}
+        for i, classifier in enumerate(classifiers):
+            if isinstance(classifier, ExactPathClassifier):
+                self._exact.setdefault(classifier.path, []).append(i)
+            elif isinstance(classifier, SubdirClassifier):
+                if not classifier.recursive:
+                    self._parent.setdefault(classifier.path, []).append(i)
+                    continue
+                node = self._tree
+                for part in _path_parts(classifier.path):
+                    node = node.setdefault(part, {})
+                node.setdefault(None, []).append(i)
+
+    def match(self, relpath: str) -> list[Classifier]:
+        """Return (weight ordered) path classifiers which match relpath"""
+        matches = self._exact.get(relpath, []) + self._parent.get(
+            dirname(relpath), []
+        )
+        node = self._tree
+        matches.extend(node.get(None, ()))
+        for part in _path_parts(relpath):
+            node = node.get(part)
+            if node is None:
+                break
+            matches.extend(node.get(None, ()))
+        return [self.classifiers[i] for i in sorted(matches)]
+
+    def classify(self, item: Item) -> None:
+        item = cast(FileItem, item)
+        for classifier in self.match(item.relpath):
+            item.add_tags(classifier, classifier.tags[:])
+            metrics.count(
+                "classifier", classifier.__class__.__name__, tagged=1
+            )
+
+
+def _path_parts(path: str) -> list[str]:
+    return [part for part in path.split("/") if part]
+
+
+def compile_classifiers(classifiers: list[Classifier]) -> list[Classifier]:
+    """
+    Replace path classifiers with a single `PathRuleClassifier`
+
+    It takes the place of the first (lowest weight) path classifier, so
+    classifiers in between see their tags slightly earlier than they would
+    otherwise
+    """
+    path_classifiers = [c for c in classifiers if _is_path_classifier(c)]
+    if not path_classifiers:
+        return classifiers
+    compiled: list[Classifier] = []
+    for classifier in classifiers:
+        if classifier is path_classifiers[0]:
+            compiled.append(PathRuleClassifier(path_classifiers))
+        elif classifier not in path_classifiers:
+            compiled.append(classifier)
+    return compiled
@@ -35,6 +35,8 @@ def initialize_common_data(appliance_root: str) -> None:
     """Parse plan & makefile and initialize data which utilizes it"""
     global APPLIANCE_ROOT, _FAB_DATA
     APPLIANCE_ROOT = appliance_root
+    _PLAN_RESOLVE_CACHE.clear()
+    _INCLUDED_PLAN_CACHE.clear()
 
     for plan_path in iter_plan(appliance_root):
         entries = parse_plan(plan_path)
@@ -47,3 +47,23 @@ class InvalidPlanError(TKLDevDetectiveError):
 
     Mismatched #if* and #endif directives likely
     """
+
+
+class GitError(TKLDevDetectiveError):
+    """
+    A git command failed
+
+    Likely not a git repository or revision is unknown
+    """
+
+
+class WatchError(TKLDevDetectiveError):
+    """inotify is unavailable or a watch couldn't be added"""
+
+
+class FilterError(TKLDevDetectiveError):
+    """
+    A report filter misbehaved
+
+    Likely `filter_batch` didn't return a result for every report
+    """
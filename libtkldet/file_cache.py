@@ -0,0 +1,281 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Per run cache of file contents
+
+Classifiers, linters and report formatting often need the same file, so
+contents are read once and shared. Large files are mmapped rather than read,
+and least recently used files are dropped once the cache grows too large
+"""
+
+import locale
+import mmap
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .file_util import FileStat
+
+MMAP_THRESHOLD = 1024 * 1024
+"files of at least this many bytes are mmapped instead of read"
+
+CONTENT_CACHE_MAX_SIZE = 64 * 1024 * 1024
+"once cached files exceed this many bytes, least recently used are dropped"
+
+CONTENT_CACHE_MAX_FILES = 512
+"maximum number of files kept in the cache"
+
+_LOCK = threading.Lock()
+_CACHE: "OrderedDict[str, FileContent]" = OrderedDict()
+_CACHE_SIZE = 0
+
+
+class LineIndex:
+    """
+    Offsets at which each line of a str or bytes starts
+
+    Built once, so finding a line or the position of an offset is a binary
+    search rather than a scan from the start
+    """
+
+    def __init__(self, data: str | bytes | mmap.mmap) -> None:
+        newline = "\n" if isinstance(data, str) else b"\n"
+        starts = [0]
+        find = data.find
+        pos = find(newline)
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find(newline, pos + 1)
+        self.size = len(data)
+        # a trailing newline doesn't start another line
+        if starts[-1] == self.size:
+            starts.pop()
+        self.starts = starts
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def span(self, line: int) -> tuple[int, int]:
+        """Return (start, end) offsets of line, end includes the newline"""
+        if line + 1 < len(self.starts):
+            return self.starts[line], self.starts[line + 1]
+        return self.starts[line], self.size
+
+    def position(self, offset: int) -> tuple[int, int] | None:
+        """Return (line, column) of offset, None if outside of data"""
+        if not 0 <= offset < self.size:
+            return None
+        line = bisect_right(self.starts, offset) - 1
+        return line, offset - self.starts[line]
+
+    def positions(
+        self, offsets: Iterable[int]
+    ) -> list[tuple[int, int] | None]:
+        """Return (line, column) of each offset, as `position` would"""
+        starts = self.starts
+        size = self.size
+        positions: list[tuple[int, int] | None] = []
+        for offset in offsets:
+            if not 0 <= offset < size:
+                positions.append(None)
+                continue
+            line = bisect_right(starts, offset) - 1
+            positions.append((line, offset - starts[line]))
+        return positions
+
+
+class FileContent:
+    """
+    Contents of a file
+
+    `data` is the raw bytes (an mmap for large files), `text` and `lines`
+    are decoded as `open(path, "r")` would, including universal newlines
+    """
+
+    def __init__(
+        self, path: str, data: bytes | mmap.mmap, mtime_ns: int, size: int
+    ) -> None:
+        self.path = path
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.encoding = locale.getpreferredencoding(False)
+        "encoding used to decode `text`, as `open` would"
+        self._text: str | None = None
+        self._text_index: LineIndex | None = None
+        self._byte_index: LineIndex | None = None
+
+    @property
+    def text(self) -> str:
+        """Decoded contents, raises UnicodeDecodeError if not text"""
+        if self._text is None:
+            text = bytes(self.data).decode(self.encoding)
+            self._text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return self._text
+
+    @property
+    def text_index(self) -> LineIndex:
+        """Line index of `text`"""
+        if self._text_index is None:
+            self._text_index = LineIndex(self.text)
+        return self._text_index
+
+    @property
+    def byte_index(self) -> LineIndex:
+        """Line index of raw `data`"""
+        if self._byte_index is None:
+            self._byte_index = LineIndex(self.data)
+        return self._byte_index
+
+    def char_column(self, line: int, byte_column: int) -> int:
+        """
+        Convert a byte column of a line of raw `data` to a character column
+
+        A column in the middle of a multi-byte character counts only the
+        characters before it
+        """
+        start = self.byte_index.starts[line]
+        prefix = bytes(self.data[start : start + byte_column])
+        return len(prefix.decode(self.encoding, errors="ignore"))
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines in `text`"""
+        return len(self.text_index)
+
+    def line(self, index: int) -> str:
+        """Return line (0 indexed) of `text`, including its newline"""
+        start, end = self.text_index.span(index)
+        return self.text[start:end]
+
+    @property
+    def lines(self) -> list[str]:
+        """Lines of `text` (a new list each time), as iterating a file would"""
+        return [self.line(i) for i in range(self.line_count)]
+
+
+def _load(path: str, mtime_ns: int, size: int) -> FileContent | None:
+    try:
+        with open(path, "rb") as fob:
+            if size >= MMAP_THRESHOLD:
+                data: bytes | mmap.mmap = mmap.mmap(
+                    fob.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            else:
+                data = fob.read()
+    except (OSError, ValueError):
+        return None
+    return FileContent(path, data, mtime_ns, len(data))
+
+
+def _current_stat(
+    path: str, file_stat: "FileStat | None"
+) -> tuple[int, int] | None:
+    # (mtime_ns, size) of file, None if it doesn't exist
+    if file_stat is None or file_stat.is_symlink:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    return file_stat.mtime_ns, file_stat.size
+
+
+def _get_cached(path: str, mtime_ns: int, size: int) -> FileContent | None:
+    global _CACHE_SIZE
+    with _LOCK:
+        content = _CACHE.get(path)
+        if content is not None:
+            if (content.mtime_ns, content.size) == (mtime_ns, size):
+                _CACHE.move_to_end(path)
+                return content
+            del _CACHE[path]
+            _CACHE_SIZE -= content.size
+    return None
+
+
+def get_head(
+    path: str, size: int, file_stat: "FileStat | None" = None
+) -> bytes | None:
+    """
+    Return first `size` bytes of file at path, None if it can't be read
+
+    Taken from cached contents if the file has already been read, otherwise
+    only `size` bytes are read and nothing is cached
+    """
+    current = _current_stat(path, file_stat)
+    if current is None:
+        return None
+    content = _get_cached(path, *current)
+    if content is not None:
+        return bytes(content.data[:size])
+    try:
+        with open(path, "rb") as fob:
+            return fob.read(size)
+    except (OSError, ValueError):
+        return None
+
+
+def get_content(
+    path: str, file_stat: "FileStat | None" = None
+) -> FileContent | None:
+    """
+    Return contents of file at path, None if it can't be read
+
+    `file_stat` (if known & not a symlink) saves statting the file to check
+    cached contents are still current
+    """
+    global _CACHE_SIZE
+    current = _current_stat(path, file_stat)
+    if current is None:
+        return None
+    mtime_ns, size = current
+    content = _get_cached(path, mtime_ns, size)
+    if content is not None:
+        return content
+
+    content = _load(path, mtime_ns, size)
+    if content is None:
+        return None
+
+    with _LOCK:
+        previous = _CACHE.pop(path, None)
+        if previous is not None:
+            _CACHE_SIZE -= previous.size
+        _CACHE[path] = content
+        _CACHE_SIZE += content.size
+        # the file just read is always kept, even if it's too large alone
+        while len(_CACHE) > 1 and (
+            _CACHE_SIZE > CONTENT_CACHE_MAX_SIZE
+            or len(_CACHE) > CONTENT_CACHE_MAX_FILES
+        ):
+            _, evicted = _CACHE.popitem(last=False)
+            _CACHE_SIZE -= evicted.size
+    return content
+
+
+def clear() -> None:
+    """Forget all cached contents"""
+    global _CACHE_SIZE
+    with _LOCK:
+        _CACHE.clear()
+        _CACHE_SIZE = 0
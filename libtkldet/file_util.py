@@ -17,6 +17,174 @@
 
 """Utilities relating to classification/linting files"""
 
+import os
+import stat
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from .file_cache import get_content
+
+ARG_MAX_HEADROOM = 4096
+"bytes of ARG_MAX left unused when chunking, in case of miscalculation"
+
+
+@dataclass(frozen=True)
+class FileStat:
+    """
+    Stat information of a located file
+
+    Gathered while locating files so classifiers & linters don't need to
+    stat files again. `is_file` & `is_dir` follow symlinks, everything else
+    describes the path itself (as with lstat)
+    """
+
+    is_file: bool
+    is_dir: bool
+    is_symlink: bool
+    mode: int
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def from_entry(cls, entry: os.DirEntry) -> "FileStat":
+        """Create from scandir entry, reusing whatever scandir knows"""
+        st = entry.stat(follow_symlinks=False)
+        return cls(
+            is_file=entry.is_file(),
+            is_dir=entry.is_dir(),
+            is_symlink=stat.S_ISLNK(st.st_mode),
+            mode=st.st_mode,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+        )
+
+    @classmethod
+    def from_path(cls, path: str) -> "FileStat | None":
+        """Create from path, None if it doesn't exist"""
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return None
+        is_symlink = stat.S_ISLNK(st.st_mode)
+        target_mode = st.st_mode
+        if is_symlink:
+            try:
+                target_mode = os.stat(path).st_mode
+            except OSError:
+                target_mode = 0
+        return cls(
+            is_file=stat.S_ISREG(target_mode),
+            is_dir=stat.S_ISDIR(target_mode),
+            is_symlink=is_symlink,
+            mode=st.st_mode,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+        )
+
+
+def chunk_arguments(
+    args: list[str], reserved: int = 0
+) -> Iterator[list[str]]:
+    """
+    Split arguments into chunks that each fit on a single command line
+
+    `reserved` is the number of bytes needed by the rest of the command (the
+    executable and any options). Each yielded chunk can be appended to that
+    command without exceeding ARG_MAX
+    """
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (ValueError, OSError):
+        arg_max = 128 * 1024
+    env_size = sum(
+        len(key) + len(value) + 2 + 8 for key, value in os.environb.items()
+    )
+    limit = max(arg_max - env_size - reserved - ARG_MAX_HEADROOM, 1)
+
+    chunk: list[str] = []
+    chunk_size = 0
+    for arg in args:
+        # each argument costs its bytes, a NUL terminator and a pointer
+        size = len(os.fsencode(arg)) + 1 + 8
+        if chunk and chunk_size + size > limit:
+            yield chunk
+            chunk = []
+            chunk_size = 0
+        chunk.append(arg)
+        chunk_size += size
+    if chunk:
+        yield chunk
+
+
+def ancestors(path: str) -> Iterator[str]:
+    """Yield path, then each of its parent directories up to the root"""
+    while True:
+        yield path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return
+        path = parent
+
+
+def config_files_key(directories: Iterable[str], names: Iterable[str]) -> str:
+    """
+    Identify configuration files which may apply to a file
+
+    For use in `Linter.item_cache_key`. Includes the path, mtime & size of
+    every file with one of `names` which exists in one of `directories`
+    """
+    names = list(names)
+    parts = []
+    for directory in dict.fromkeys(directories):
+        for name in names:
+            config = os.path.join(directory, name)
+            try:
+                st = os.stat(config)
+            except OSError:
+                continue
+            parts.append(f"{config}:{st.st_mtime_ns}:{st.st_size}")
+    return "\0".join(parts)
+
+
+def positions_from_char_offsets(
+    path: str, offsets: Iterable[int]
+) -> list[tuple[int, int] | None]:
+    """
+    Get line/column of many character offsets into a file at once
+
+    Returns a list with the (line, column) tuple of each offset, in the same
+    order as offsets, or None for any offset which is invalid. The file is
+    read & indexed once no matter how many offsets are given
+    """
+    offsets = list(offsets)
+    content = get_content(path)
+    if content is None:
+        return [None] * len(offsets)
+    return content.text_index.positions(offsets)
+
+
+def positions_from_byte_offsets(
+    path: str, offsets: Iterable[int], char_columns: bool = False
+) -> list[tuple[int, int] | None]:
+    """
+    Get line/column of many byte offsets into a file at once
+
+    Same as `positions_from_char_offsets`, but offsets count bytes. Columns
+    count bytes too, unless `char_columns` is set, in which case they count
+    (possibly multi-byte) characters, as columns of reports do
+    """
+    offsets = list(offsets)
+    content = get_content(path)
+    if content is None:
+        return [None] * len(offsets)
+    positions = content.byte_index.positions(offsets)
+    if not char_columns:
+        return positions
+    return [
+        (pos[0], content.char_column(*pos)) if pos is not None else None
+        for pos in positions
+    ]
+
 
 def position_from_char_offset(
     path: str, offset: int
@@ -28,19 +196,7 @@ def position_from_char_offset(
     respectively, expressed as a tuple. If offset is invalid (such as too
     large for file) None is returned
     """
-    line = 0
-    col = 0
-    with open(path, "r") as fob:
-        for i, char in enumerate(fob.read()):
-            if i == offset:
-                return line, col
-
-            if char == "\n":
-                line += 1
-                col = 0
-            else:
-                col += 1
-    return None
+    return positions_from_char_offsets(path, [offset])[0]
 
 
 def position_from_byte_offset(
@@ -53,16 +209,4 @@ def position_from_byte_offset(
     numbers respectively, expressed as a tuple. If offset is invalid (such as
     too large for file) None is returned
     """
-    line = 0
-    col = 0
-    with open(path, "rb") as fob:
-        for i, char in enumerate(fob.read()):
-            if i == offset:
-                return line, col
-
-            if char == ord(b"\n"):
-                line += 1
-                col = 0
-            else:
-                col += 1
-    return None
+    return positions_from_byte_offsets(path, [offset])[0]
@@ -18,22 +18,27 @@
 """Utilities for annotating parts of files"""
 
 from . import colors as co
+from .file_cache import FileContent, get_content
 
 H_PAD = 6  # padding (for hint lines to account for line numbers)
 
 
+def _file_content(path: str) -> tuple[FileContent | None, int]:
+    content = get_content(path)
+    return content, content.line_count if content is not None else 0
+
+
 def extract_line(path: str, row: int) -> str:
     """Extract a single line from a file"""
-    with open(path, "r") as fob:
-        for i, line in enumerate(fob):
-            if i == row:
-                return (
-                    str(i + 1).rjust(4)
-                    + ": "
-                    + co.GREEN
-                    + line.rstrip()
-                    + co.RESET
-                )
+    content, line_count = _file_content(path)
+    if content is not None and 0 <= row < line_count:
+        return (
+            str(row + 1).rjust(4)
+            + ": "
+            + co.GREEN
+            + content.line(row).rstrip()
+            + co.RESET
+        )
     return "<COULD NOT FIND LINE>"
 
 
@@ -64,28 +69,19 @@ def extract_lines(path: str, row_span: tuple[int, int]) -> list[str]:
     """Extract a multiple lines from a file"""
     min_row, max_row = row_span
     out = []
-    with open(path, "r") as fob:
-        for i, line in enumerate(fob):
-            if i in (min_row, max_row):
-                out.append(
-                    co.RED
-                    + "> "
-                    + str(i + 1).rjust(4)
-                    + ":"
-                    + co.GREEN
-                    + line.rstrip()
-                    + co.RESET
-                )
-            elif min_row < i < max_row:
-                out.append(
-                    co.RED
-                    + "| "
-                    + str(i + 1).rjust(4)
-                    + ":"
-                    + co.GREEN
-                    + line.rstrip()
-                    + co.RESET
-                )
+    content, line_count = _file_content(path)
+    if content is None:
+        return out
+    for i in range(max(min_row, 0), min(max_row + 1, line_count)):
+        out.append(
+            co.RED
+            + ("> " if i in (min_row, max_row) else "| ")
+            + str(i + 1).rjust(4)
+            + ":"
+            + co.GREEN
+            + content.line(i).rstrip()
+            + co.RESET
+        )
     return out
 
 
@@ -96,29 +92,31 @@ def extract_lines_cols(
     min_row, max_row = row_span
     min_col, max_col = col_span
     out = []
-    with open(path, "r") as fob:
-        for i, line in enumerate(fob):
-            if min_row <= i <= max_row:
+    content, line_count = _file_content(path)
+    if content is None:
+        return out
+    for i in range(max(min_row, 0), line_count):
+        if i <= max_row:
+            out.append(
+                str(i + 1).rjust(4)
+                + ":"
+                + co.GREEN
+                + content.line(i).rstrip()
+                + co.RESET
+            )
+        if i == min_row:
+            out.append(co.RED + "^".rjust(min_col + H_PAD) + co.RESET)
+        elif i > min_row:
+            if i == max_row:
                 out.append(
-                    str(i + 1).rjust(4)
-                    + ":"
-                    + co.GREEN
-                    + line.rstrip()
+                    co.RED
+                    + "+".rjust(min_col + H_PAD)
+                    + "-" * (max_col - min_col - 1)
+                    + "^"
                     + co.RESET
                 )
-            if i == min_row:
-                out.append(co.RED + "^".rjust(min_col + H_PAD) + co.RESET)
-            elif i > min_row:
-                if i == max_row:
-                    out.append(
-                        co.RED
-                        + "+".rjust(min_col + H_PAD)
-                        + "-" * (max_col - min_col - 1)
-                        + "^"
-                        + co.RESET
-                    )
-                else:
-                    out.append(co.RED + "|".rjust(min_col + H_PAD) + co.RESET)
+            else:
+                out.append(co.RED + "|".rjust(min_col + H_PAD) + co.RESET)
     return out
 
 
@@ -57,30 +57,47 @@ class Linter:
 
         (safe to override)
         """
-        if not self.ENABLE_TAGS:
-            for tag in self.DISABLE_TAGS:
-                if tag in item.tags:
-                    return False
-        else:
-            enabled = False
-            for tag in self.ENABLE_TAGS:
-                if tag in item.tags:
-                    enabled = True
-                    break
-            for tag in self.DISABLE_TAGS:
-                if tag in item.tags:
-                    enabled = False
-                    break
-            if not enabled:
-                return False
-        return True
+        tags = item.tag_set
+        if not tags.isdisjoint(self.DISABLE_TAGS):
+            return False
+        return not self.ENABLE_TAGS or not tags.isdisjoint(self.ENABLE_TAGS)
+
+    def accepts(self, item: Item) -> bool:
+        """Check item type & `should_check`, used internally"""
+        return isinstance(item, self.ItemType) and self.should_check(item)
 
     def do_check(self, item: Item) -> Iterator[Report] | None:
         """Run lint, if `should_check` returns True, used internally"""
-        if isinstance(item, self.ItemType) and self.should_check(item):
+        if self.accepts(item):
             return self.check(item)
         return None
 
+    def cache_key(self) -> str | None:
+        """
+        Identify everything other than the item that affects lint results
+
+        Typically tool version and configuration. Results of linters which
+        return a key may be cached on disk and reused for items which haven't
+        changed. Linters which return None (the default) are never cached,
+        this should be the case for any linter depending on information
+        outside of the item itself (such as common data or other files)
+
+        (safe to override)
+        """
+        return None
+
+    def item_cache_key(self, item: Item) -> str:
+        """
+        Identify anything specific to an item (other than its contents) that
+        affects lint results
+
+        Such as configuration files found near the item. Only used if
+        `cache_key` returns a key
+
+        (safe to override)
+        """
+        return ""
+
     def check(self, item: Item) -> Iterator[Report]:
         """Actually run lint"""
         raise NotImplementedError
@@ -95,6 +112,58 @@ class FileLinter(Linter):
         raise NotImplementedError
 
 
+class BatchLinter(Linter):
+    """
+    Base class for linters which check many items at once
+
+    Rather than checking items one at a time, every item that passes
+    `should_check` is collected (`do_collect`) and once all items have been
+    seen, they are linted together (`do_flush`). This allows external tools to
+    be started once per run rather than once per item.
+
+    Reports yielded by `check_batch` must reference the item they relate to.
+    """
+
+    def __init__(self) -> None:
+        self._batch: list[Item] = []
+
+    def do_collect(self, item: Item) -> bool:
+        """
+        Collect item for later linting, if `should_check` returns True
+
+        Returns True if item was collected, used internally
+        """
+        if self.accepts(item):
+            self._batch.append(item)
+            return True
+        return False
+
+    def do_flush(self) -> Iterator[Report]:
+        """Lint all collected items and forget them, used internally"""
+        batch = self._batch
+        self._batch = []
+        if not batch:
+            return iter(())
+        return self.check_batch(batch)
+
+    def check(self, item: Item) -> Iterator[Report]:
+        """Lint a single item, as a batch of one"""
+        return self.check_batch([item])
+
+    def check_batch(self, items: list[Item]) -> Iterator[Report]:
+        """Actually run lint on every collected item"""
+        raise NotImplementedError
+
+
+class BatchFileLinter(BatchLinter):
+    """Specific batch linter that operates only on FileItems"""
+
+    ItemType: type[Item] = FileItem
+
+    def check_batch(self, items: list[Item]) -> Iterator[Report]:
+        raise NotImplementedError
+
+
 _LINTERS: list[type[Linter]] = []
 
 
@@ -113,3 +182,59 @@ def get_weighted_linters() -> list[Linter]:
     return sorted(
         (x() for x in _LINTERS), key=lambda x: (x.WEIGHT, x.__class__.__name__)
     )
+
+
+class LinterDispatch:
+    """
+    Finds linters which accept an item without asking every linter
+
+    Linters are indexed by their `ENABLE_TAGS`, and which linters accept a
+    given item type & tag set is remembered, so items with the same tags (the
+    vast majority) cost a single lookup. Linters overriding `should_check` are
+    still asked about every item
+    """
+
+    def __init__(self, linters: list[Linter]) -> None:
+        self.linters = linters
+        self._untagged: list[int] = []
+        self._by_tag: dict[str, list[int]] = {}
+        self._custom: list[int] = []
+        for i, linter in enumerate(linters):
+            if type(linter).should_check is not Linter.should_check:
+                self._custom.append(i)
+            elif not linter.ENABLE_TAGS:
+                self._untagged.append(i)
+            else:
+                for tag in linter.ENABLE_TAGS:
+                    self._by_tag.setdefault(tag, []).append(i)
+        self._cache: dict[tuple[type, frozenset[str]], list[int]] = {}
+
+    def _tag_matches(self, item: Item) -> list[int]:
+        key = (type(item), item.tag_set)
+        matches = self._cache.get(key)
+        if matches is None:
+            candidates = set(self._untagged)
+            for tag in item.tag_set:
+                candidates.update(self._by_tag.get(tag, ()))
+            matches = sorted(
+                i
+                for i in candidates
+                if isinstance(item, self.linters[i].ItemType)
+                and item.tag_set.isdisjoint(self.linters[i].DISABLE_TAGS)
+            )
+            self._cache[key] = matches
+        return matches
+
+    def indices(self, item: Item) -> list[int]:
+        """Return (weight ordered) indices of linters which accept item"""
+        matches = self._tag_matches(item)
+        if not self._custom:
+            return matches
+        return sorted(
+            matches
+            + [i for i in self._custom if self.linters[i].accepts(item)]
+        )
+
+    def linters_for(self, item: Item) -> list[Linter]:
+        """Return (weight ordered) linters which accept item"""
+        return [self.linters[i] for i in self.indices(item)]
@@ -17,15 +17,30 @@
 
 """locates files to be classified and eventually linted"""
 
-from collections.abc import Iterator
-from glob import iglob
+import os
+import subprocess
+from collections.abc import Iterable, Iterator
 from logging import getLogger
-from os.path import basename, isdir, isfile, join, normpath
+from os import listdir
+from os.path import (
+    abspath,
+    basename,
+    dirname,
+    isdir,
+    isfile,
+    join,
+    normpath,
+    relpath,
+)
 
-from .error import ApplianceNotFoundError
+from .error import ApplianceNotFoundError, GitError
+from .file_util import FileStat
 
 PRODUCTS_DIR = "/turnkey/fab/products"
 
+TOP_LEVEL_FILES = ["Makefile", "changelog", "README.rst", "removelist"]
+"files directly inside the appliance root which are linted"
+
 logger = getLogger(__name__)
 
 
@@ -53,6 +68,15 @@ def is_inside_appliance(path: str) -> bool:
     )  # if path is non-zero length, it must be a path into an appliance
 
 
+def iter_appliances() -> Iterator[str]:
+    """Yield names of every appliance in PRODUCTS_DIR, in sorted order"""
+    if not isdir(PRODUCTS_DIR):
+        return
+    for name in sorted(listdir(PRODUCTS_DIR)):
+        if is_appliance_path(join(PRODUCTS_DIR, name)):
+            yield name
+
+
 def get_appliance_root(path: str) -> str:
     """
     Get appliance root from path
@@ -82,27 +106,31 @@ def get_appliance_root(path: str) -> str:
     return root
 
 
-def locator(root: str, ignore_non_appliance: bool) -> Iterator[str]:
+Entry = tuple[str, FileStat | None]
+"a located path & its stat information (None if it doesn't exist)"
+
+
+def locate(root: str, ignore_non_appliance: bool) -> Iterator[Entry]:
     """
-    Yield most files inside appliance
+    Yield most files inside appliance, along with their stat information
 
     Yields almost every file in an appliance of potential concern
     or a specific file only if given a path to a file inside an appliance
     """
     if is_appliance_name(root):
         logger.debug("locator(_) # is appliance name")
-        yield from full_appliance_locator(join(PRODUCTS_DIR, root))
+        yield from _appliance_entries(join(PRODUCTS_DIR, root))
     elif is_appliance_path(root):
         logger.debug("locator(_) # is appliance path")
-        yield from full_appliance_locator(root)
+        yield from _appliance_entries(root)
     elif is_inside_appliance(root):
         logger.debug("locator(_) # is inside appliance")
-        yield from full_appliance_locator(get_appliance_root(root))
+        yield from _appliance_entries(get_appliance_root(root))
     elif ignore_non_appliance:
         logger.debug(
             "locator(_) # is not an appliance (but ignore_non_appliance set)"
         )
-        yield from everything_locator(root)
+        yield from _everything_entries(root)
     else:
         error_message = (
             "input does not appear to be an appliance name, path to an"
@@ -111,35 +139,177 @@ def locator(root: str, ignore_non_appliance: bool) -> Iterator[str]:
         raise ApplianceNotFoundError(error_message)
 
 
-def everything_locator(root: str) -> Iterator[str]:
-    """Yield everything, appliance or not"""
+def locator(root: str, ignore_non_appliance: bool) -> Iterator[str]:
+    """
+    Yield most files inside appliance
+
+    Yields almost every file in an appliance of potential concern
+    or a specific file only if given a path to a file inside an appliance
+    """
+    for path, _ in locate(root, ignore_non_appliance):
+        yield path
+
+
+def _scandir(path: str) -> list[os.DirEntry]:
+    try:
+        with os.scandir(path) as entries:
+            return list(entries)
+    except OSError:
+        return []
+
+
+def _walk(
+    path: str,
+    include_hidden: bool,
+    recursive: bool,
+    parents: set[tuple[int, int]],
+) -> Iterator[Entry]:
+    """
+    Yield entries inside path, depth first in directory order (as glob does)
+
+    Symlinks to directories are followed, unless they lead back to a parent
+    directory
+    """
+    for entry in _scandir(path):
+        if not include_hidden and entry.name.startswith("."):
+            continue
+        try:
+            file_stat = FileStat.from_entry(entry)
+        except OSError:
+            # removed since scanning
+            continue
+        yield entry.path, file_stat
+        if not recursive or not file_stat.is_dir:
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        key = (st.st_dev, st.st_ino)
+        if key in parents:
+            logger.warning("not following symlink loop at %s", entry.path)
+            continue
+        parents.add(key)
+        yield from _walk(entry.path, include_hidden, recursive, parents)
+        parents.discard(key)
+
+
+def _tree_entries(path: str, include_hidden: bool) -> Iterator[Entry]:
+    """
+    Yield directory itself (with trailing slash) & everything inside
+
+    Nothing is yielded if path isn't a directory (e.g. an appliance without
+    an overlay)
+    """
+    file_stat = FileStat.from_path(path)
+    if file_stat is None or not file_stat.is_dir:
+        return
+    yield join(path, ""), file_stat
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    yield from _walk(path, include_hidden, True, {(st.st_dev, st.st_ino)})
+
+
+def _everything_entries(root: str) -> Iterator[Entry]:
     if isfile(root):
-        yield root
+        yield root, FileStat.from_path(root)
     else:
-        yield from iglob(join(root, "**"), recursive=True, include_hidden=True)
+        yield from _tree_entries(root, True)
+
+
+def _appliance_entries(root: str) -> Iterator[Entry]:
+    for name in TOP_LEVEL_FILES:
+        path = join(root, name)
+        yield path, FileStat.from_path(path)
+    yield from _walk(join(root, "conf.d"), False, False, set())
+    yield from _walk(join(root, "plan"), False, False, set())
+    yield from _tree_entries(join(root, "overlay"), False)
+
+
+def everything_locator(root: str) -> Iterator[str]:
+    """Yield everything, appliance or not"""
+    for path, _ in _everything_entries(root):
+        yield path
 
 
 def full_appliance_locator(root: str) -> Iterator[str]:
     """Yield (pretty much) every file in an appliance of potential concern"""
-    yield from (
-        join(root, x)
-        for x in ["Makefile", "changelog", "README.rst", "removelist"]
-    )
-    yield from iter_conf(root)
-    yield from iter_plan(root)
-    yield from iter_overlay(root)
+    for path, _ in _appliance_entries(root):
+        yield path
+
+
+def is_located(root: str, path: str) -> bool:
+    """Check if `full_appliance_locator` would yield a given path"""
+    rel = relpath(path, root)
+    if rel in TOP_LEVEL_FILES:
+        return True
+    parts = rel.split("/")
+    if rel.startswith("..") or any(part.startswith(".") for part in parts):
+        # outside of appliance, or hidden (which globs skip)
+        return False
+    if parts[0] in ("conf.d", "plan"):
+        return len(parts) == 2
+    return parts[0] == "overlay" and len(parts) > 1
 
 
 def iter_conf(root: str) -> Iterator[str]:
     """Yield each conf file in the appliance"""
-    yield from iglob(join(root, "conf.d/*"))
+    for path, _ in _walk(join(root, "conf.d"), False, False, set()):
+        yield path
 
 
 def iter_plan(root: str) -> Iterator[str]:
     """Yield each plan file in the appliance"""
-    yield from iglob(join(root, "plan/*"))
+    for path, _ in _walk(join(root, "plan"), False, False, set()):
+        yield path
 
 
 def iter_overlay(root: str) -> Iterator[str]:
     """Yield each file in the appliance overlay"""
-    yield from iglob(join(root, "overlay/**"), recursive=True)
+    for path, _ in _tree_entries(join(root, "overlay"), False):
+        yield path
+
+
+def _git_paths(root: str, args: list[str]) -> list[str]:
+    """Run git command in root which outputs NUL separated paths"""
+    ret = subprocess.run(
+        ["git", "-C", root, *args],
+        capture_output=True,
+        text=True,
+    )
+    if ret.returncode != 0:
+        error_message = f"git {args[0]} failed: {ret.stderr.strip()}"
+        raise GitError(error_message)
+    return [join(root, path) for path in ret.stdout.split("\0") if path]
+
+
+def changed_files(root: str, rev: str) -> set[str]:
+    """
+    Get files changed since a given revision
+
+    Returns absolute paths of files under root (which must be inside a git
+    repo) that differ from `rev`, including uncommitted & untracked files. If
+    root is a file, files in its directory are checked
+    """
+    if isfile(root):
+        root = dirname(root)
+    changed = _git_paths(
+        root, ["diff", "--name-only", "--relative", "-z", rev, "--"]
+    )
+    changed.extend(
+        _git_paths(root, ["ls-files", "--others", "--exclude-standard", "-z"])
+    )
+    return {abspath(path) for path in changed}
+
+
+def filter_changed(
+    paths: Iterable[str], root: str, rev: str
+) -> Iterator[str]:
+    """Yield only paths which have changed since `rev`"""
+    changed = changed_files(root, rev)
+    logger.debug("%d files changed since %s", len(changed), rev)
+    for path in paths:
+        if abspath(path) in changed:
+            yield path
@@ -0,0 +1,179 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Per classifier, linter & filter metrics
+
+Disabled unless `enable` is called. Counts and time spent (including CPU time
+& peak memory of processes they run) are recorded for each component, and
+can be exported as json
+"""
+
+import resource
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import asdict, dataclass, fields
+
+KINDS = ("classifier", "linter", "filter")
+
+_ENABLED = False
+_LOCK = threading.Lock()
+_DISABLED = nullcontext()
+
+
+@dataclass
+class Metrics:
+    """
+    Metrics of a single classifier, linter or filter
+
+    When linting in parallel, processes run by other components at the same
+    time may be counted towards child cpu time & peak memory
+    """
+
+    name: str
+
+    checked: int = 0
+    "items classified / linted, or reports filtered"
+
+    skipped: int = 0
+    """items a linter didn't accept (`should_check` or wrong item type), or
+    reports a filter doesn't handle"""
+
+    cached: int = 0
+    "items a linter's results were reused from the cache for"
+
+    tagged: int = 0
+    "items a classifier added tags to"
+
+    reports: int = 0
+    "reports produced by a linter, or yielded by a filter"
+
+    wall_time: float = 0.0
+    "seconds spent, may overlap with other components when run in parallel"
+
+    child_cpu_time: float = 0.0
+    "user + system seconds used by processes run"
+
+    child_max_rss_kb: int | None = None
+    """peak resident memory of any process run, in KiB. Only the peak of all
+    processes run so far is known, so this is None unless a process run by
+    this component set a new peak"""
+
+
+_METRICS: dict[str, dict[str, Metrics]] = {kind: {} for kind in KINDS}
+
+
+def enable() -> None:
+    """Start recording metrics"""
+    global _ENABLED
+    _ENABLED = True
+
+
+def is_enabled() -> bool:
+    """Check if metrics are being recorded"""
+    return _ENABLED
+
+
+def _get(kind: str, name: str) -> Metrics:
+    # lock must be held
+    metrics = _METRICS[kind].get(name)
+    if metrics is None:
+        metrics = _METRICS[kind][name] = Metrics(name)
+    return metrics
+
+
+def count(kind: str, name: str, **counts: int) -> None:
+    """Add to counts (e.g. `checked=1`) of a component"""
+    if not _ENABLED:
+        return
+    with _LOCK:
+        metrics = _get(kind, name)
+        for key, value in counts.items():
+            setattr(metrics, key, getattr(metrics, key) + value)
+
+
+@contextmanager
+def _measured(kind: str, name: str) -> Iterator[None]:
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - start
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        with _LOCK:
+            metrics = _get(kind, name)
+            metrics.wall_time += wall_time
+            metrics.child_cpu_time += (after.ru_utime - before.ru_utime) + (
+                after.ru_stime - before.ru_stime
+            )
+            # only the peak of all children is available, if it grew a
+            # process run here must have reached it
+            if after.ru_maxrss > before.ru_maxrss:
+                metrics.child_max_rss_kb = max(
+                    metrics.child_max_rss_kb or 0, after.ru_maxrss
+                )
+
+
+def measure(kind: str, name: str) -> AbstractContextManager[None]:
+    """Record time & resources used by a block (does nothing if disabled)"""
+    if not _ENABLED:
+        return _DISABLED
+    return _measured(kind, name)
+
+
+def snapshot() -> dict[str, list[dict]]:
+    """Return current metrics as json serializable dict"""
+    with _LOCK:
+        return {
+            kind + "s": [
+                asdict(metrics)
+                for _, metrics in sorted(_METRICS[kind].items())
+            ]
+            for kind in KINDS
+        }
+
+
+def merge(data: dict[str, list[dict]]) -> None:
+    """Add metrics from `snapshot` output (e.g. from another process)"""
+    with _LOCK:
+        for kind in KINDS:
+            for other in data.get(kind + "s", []):
+                metrics = _get(kind, other["name"])
+                for field in fields(Metrics):
+                    if field.name == "name":
+                        continue
+                    current = getattr(metrics, field.name)
+                    if field.name == "child_max_rss_kb":
+                        peaks = [
+                            peak
+                            for peak in (current, other[field.name])
+                            if peak is not None
+                        ]
+                        value = max(peaks, default=None)
+                    else:
+                        value = current + other[field.name]
+                    setattr(metrics, field.name, value)
+
+
+def reset() -> None:
+    """Forget all recorded metrics"""
+    with _LOCK:
+        for kind in KINDS:
+            _METRICS[kind].clear()
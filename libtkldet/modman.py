@@ -15,20 +15,83 @@
 # You should have received a copy of the GNU General Public License along with
 # tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
 
-"""handles loading / managing tkldev-detective-modules"""
+"""
+handles loading / managing tkldev-detective-modules
 
+Modules are loaded lazily. A manifest recording what each module registers
+(and which tags its linters need) is generated by loading every module once,
+then cached next to the modules until they (or the tools they may detect)
+change. Afterwards only modules providing classifiers (or linters which can't
+be matched by tags) are loaded up front, the rest are loaded once an item
+with a relevant tag, or a report to filter, turns up
+"""
+
+import hashlib
 import importlib.machinery
 import importlib.util
+import json
+import os
 import sys
+from dataclasses import asdict, dataclass, field
 from os import listdir
 from os.path import abspath, dirname, exists, isfile, join, splitext
 
 from . import colors as co
+from .cache import CACHE_DIR
+from .classifier import _CLASSIFIERS
 from .error import TKLDevDetectiveError
+from .linter import _LINTERS, Linter
+from .report import _FILTERS
+from .tools import DPKG_STATUS
 
 # priortise local tkldet_modules path, fallback to OS path
 MOD_PATH = [dirname(dirname(abspath(__file__))), "/usr/share/tkldev-detective"]
 
+MANIFEST_NAME = ".manifest.json"
+
+_MANIFEST_VERSION = 1
+
+
+@dataclass
+class ModuleInfo:
+    """What a single module registers"""
+
+    path: str
+    classifiers: list[str] = field(default_factory=list)
+    linters: list[str] = field(default_factory=list)
+    filters: list[str] = field(default_factory=list)
+    tags: list[str] = field(default_factory=list)
+    "tags any of this module's linters are enabled by"
+    eager: bool = False
+    "must be loaded up front (provides classifiers or untagged linters)"
+    loaded: bool = False
+
+
+_MODULES: list[ModuleInfo] = []
+
+
+def _load_module(path: str) -> None:
+    mod_name = splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(mod_name, path)
+    assert spec is not None
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+
+    print(
+        co.BRIGHT_BLACK + co.BOLD + "loaded",
+        spec.name + co.RESET,
+        file=sys.stderr,
+    )
+
+
+def _module_paths(root: str) -> list[str]:
+    return sorted(
+        join(root, filename)
+        for filename in listdir(root)
+        if isfile(join(root, filename)) and splitext(filename)[1] == ".py"
+    )
+
 
 def _load_all_modules_from_dir(root: str) -> None:
     print(
@@ -37,28 +100,176 @@ def _load_all_modules_from_dir(root: str) -> None:
         file=sys.stderr,
     )
     root = abspath(root)
-    for filename in listdir(root):
-        path = join(root, filename)
-        mod_name, ext = splitext(filename)
-        if isfile(path) and ext == ".py":
-            spec = importlib.util.spec_from_file_location(mod_name, path)
-            assert spec is not None
-            module = importlib.util.module_from_spec(spec)
-            assert spec.loader is not None
-            spec.loader.exec_module(module)
-
-            print(
-                co.BRIGHT_BLACK + co.BOLD + "loaded",
-                spec.name + co.RESET,
-                file=sys.stderr,
-            )
-
-
-def load_modules() -> None:
-    """Load all tkldev-detective modules"""
+    for path in _module_paths(root):
+        _load_module(path)
+
+
+def _linter_tags(linter: type[Linter]) -> set[str] | None:
+    """Return tags which enable linter, None if it can't be matched on tags"""
+    if linter.should_check is not Linter.should_check:
+        return None
+    return set(getattr(linter, "ENABLE_TAGS", set())) or None
+
+
+def _generate_manifest(paths: list[str]) -> list[ModuleInfo]:
+    """Load every module, recording what each registers"""
+    modules = []
+    for path in paths:
+        n_classifiers, n_linters, n_filters = (
+            len(_CLASSIFIERS),
+            len(_LINTERS),
+            len(_FILTERS),
+        )
+        _load_module(path)
+        info = ModuleInfo(path, loaded=True)
+        info.classifiers = [x.__name__ for x in _CLASSIFIERS[n_classifiers:]]
+        info.filters = [x.__name__ for x in _FILTERS[n_filters:]]
+        tags: set[str] = set()
+        for linter in _LINTERS[n_linters:]:
+            info.linters.append(linter.__name__)
+            linter_tags = _linter_tags(linter)
+            if linter_tags is None:
+                info.eager = True
+            else:
+                tags.update(linter_tags)
+        info.tags = sorted(tags)
+        info.eager = info.eager or bool(info.classifiers)
+        modules.append(info)
+    return modules
+
+
+def _manifest_stamp(paths: list[str]) -> list:
+    """
+    Return everything which may change what modules register
+
+    Modules only register linters for tools which are available, so the
+    python version, PATH and dpkg's database are included as well as the
+    modules themselves
+    """
+    stamp: list = [_MANIFEST_VERSION, sys.version, os.getenv("PATH", "")]
+    search_path = os.getenv("PATH", "").split(os.pathsep)
+    for path in [*paths, DPKG_STATUS, *search_path]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            stamp.append([path, None, None])
+        else:
+            stamp.append([path, st.st_mtime_ns, st.st_size])
+    return stamp
+
+
+def _manifest_paths(root: str) -> list[str]:
+    """Return places manifest may be saved, preferring next to modules"""
+    digest = hashlib.sha256(root.encode()).hexdigest()[:16]
+    return [
+        join(root, MANIFEST_NAME),
+        join(CACHE_DIR, f"modules-{digest}.json"),
+    ]
+
+
+def _read_manifest(root: str, stamp: list) -> list[ModuleInfo] | None:
+    for path in _manifest_paths(root):
+        try:
+            with open(path, "r") as fob:
+                data = json.load(fob)
+        except (OSError, ValueError):
+            continue
+        if data.get("stamp") == stamp:
+            return [ModuleInfo(**info) for info in data["modules"]]
+    return None
+
+
+def _write_manifest(
+    root: str, stamp: list, modules: list[ModuleInfo]
+) -> None:
+    data = {
+        "stamp": stamp,
+        "modules": [
+            {**asdict(info), "loaded": False} for info in modules
+        ],
+    }
+    for path in _manifest_paths(root):
+        try:
+            os.makedirs(dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as fob:
+                json.dump(data, fob)
+            os.replace(tmp_path, path)
+        except OSError:
+            continue
+        return
+
+
+def _find_modules_dir() -> str:
     for _path in (join(x, "tkldet_modules") for x in MOD_PATH):
         if exists(_path):
-            _load_all_modules_from_dir(_path)
-            return
+            return abspath(_path)
     error_message = f"Mod path 'tkldet_modules' not found - tried {MOD_PATH}"
     raise TKLDevDetectiveError(error_message)
+
+
+def load_modules(lazy: bool = True) -> None:
+    """
+    Load tkldev-detective modules
+
+    If lazy, modules which aren't needed up front are only loaded by
+    `load_modules_for_tags` & `load_filter_modules`
+    """
+    root = _find_modules_dir()
+    if not lazy:
+        _load_all_modules_from_dir(root)
+        _MODULES[:] = [
+            ModuleInfo(path, loaded=True) for path in _module_paths(root)
+        ]
+        return
+
+    paths = _module_paths(root)
+    stamp = _manifest_stamp(paths)
+    modules = _read_manifest(root, stamp)
+    if modules is None:
+        print(
+            co.BRIGHT_BLACK + co.BOLD + "generating module manifest for",
+            root + co.RESET,
+            file=sys.stderr,
+        )
+        modules = _generate_manifest(paths)
+        _write_manifest(root, stamp, modules)
+    else:
+        for info in modules:
+            if info.eager:
+                _load_module(info.path)
+                info.loaded = True
+    _MODULES[:] = modules
+
+
+def _load_matching(modules: list[ModuleInfo]) -> bool:
+    for info in modules:
+        _load_module(info.path)
+        info.loaded = True
+    return bool(modules)
+
+
+def load_modules_for_tags(tags: set[str]) -> bool:
+    """
+    Load modules with linters enabled by any of tags
+
+    Returns True if any modules were loaded (i.e. there may be new linters)
+    """
+    return _load_matching(
+        [
+            info
+            for info in _MODULES
+            if not info.loaded and not tags.isdisjoint(info.tags)
+        ]
+    )
+
+
+def load_filter_modules() -> bool:
+    """
+    Load modules providing report filters
+
+    Returns True if any modules were loaded
+    """
+    return _load_matching(
+        [info for info in _MODULES if not info.loaded and info.filters]
+    )
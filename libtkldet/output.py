@@ -0,0 +1,279 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Writers which output reports in various formats
+
+Reports are written as they're produced, nothing is kept in memory once
+written (apart from the reports of the file currently being written). Each
+report is first converted to a "record" (which may be done in another
+process, e.g. by fleet workers) and then written
+"""
+
+import json
+from pathlib import Path
+from typing import ClassVar, TextIO
+
+from .cache import report_to_dict
+from .classifier import FileItem
+from .file_cache import get_content
+from .report import FileReport, Report, report_symbol
+
+SARIF_VERSION = "2.1.0"
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+INFORMATION_URI = "https://github.com/turnkeylinux/tkldev-detective"
+
+_SARIF_LEVELS = {
+    "INFO": "note",
+    "CONVENTION": "note",
+    "REFACTOR": "warning",
+    "WARN": "warning",
+    "ERROR": "error",
+    "SECURITY": "error",
+}
+
+
+def format_text(report: Report) -> str:
+    """Format report for the terminal, as shown by `lint`"""
+    return "\n|   ".join(report.format().split("\n")) + "\n"
+
+
+def _first_line(report: Report) -> int:
+    if isinstance(report, FileReport):
+        if isinstance(report.line, tuple):
+            return report.line[0]
+        if report.line is not None:
+            return report.line
+    return 0
+
+
+def sort_by_line(reports: list[Report]) -> list[Report]:
+    """
+    Return reports (of a single item) sorted by line
+
+    Reports without a line come first, otherwise the order of reports is kept
+    """
+    return sorted(reports, key=_first_line)
+
+
+def report_to_json(report: Report) -> dict:
+    """Convert report (including its item) to a json serializable dict"""
+    item = report.item
+    item_data = {"type": item.__class__.__name__, "value": item.value}
+    if isinstance(item, FileItem):
+        item_data["relpath"] = item.relpath
+        item_data["abspath"] = item.abspath
+    return {"item": item_data, **report_to_dict(report)}
+
+
+class ReportWriter:
+    """
+    Writes reports to a file
+
+    Call `begin` before writing any reports and `end` once finished
+    """
+
+    FORMAT: ClassVar[str]
+
+    def __init__(self, fob: TextIO) -> None:
+        self.fob = fob
+
+    @staticmethod
+    def record(report: Report) -> str | dict:
+        """Convert report to what `write_record` expects (picklable)"""
+        raise NotImplementedError
+
+    def begin(self) -> None:
+        """Write anything required before reports"""
+
+    def write(self, report: Report) -> None:
+        """Write a single report"""
+        self.write_record(self.record(report))
+
+    def write_group(self, reports: list[Report]) -> None:
+        """Write reports of a single item"""
+        self.write_records([self.record(report) for report in reports])
+
+    def write_record(self, record: str | dict) -> None:
+        """Write a single report, already converted with `record`"""
+        raise NotImplementedError
+
+    def write_records(self, records: list[str | dict]) -> None:
+        """Write many reports, already converted with `record`"""
+        for record in records:
+            self.write_record(record)
+
+    def end(self) -> None:
+        """Write anything required after reports"""
+        self.fob.flush()
+
+
+class TextWriter(ReportWriter):
+    """Writes reports as shown in the terminal"""
+
+    FORMAT: ClassVar[str] = "text"
+
+    @staticmethod
+    def record(report: Report) -> str | dict:
+        return format_text(report)
+
+    def write_group(self, reports: list[Report]) -> None:
+        item = reports[0].item
+        if isinstance(item, FileItem):
+            # every snippet comes from the same file, read it (at most) once
+            # up front
+            get_content(item.abspath, item.stat)
+        super().write_group(reports)
+
+    def write_record(self, record: str | dict) -> None:
+        self.fob.write(f"{record}\n")
+
+    def write_records(self, records: list[str | dict]) -> None:
+        # a single write, rather than one (and maybe a flush) per report
+        self.fob.write("".join(f"{record}\n" for record in records))
+
+
+class JsonLinesWriter(ReportWriter):
+    """Writes a json object per report, one per line"""
+
+    FORMAT: ClassVar[str] = "jsonl"
+
+    @staticmethod
+    def record(report: Report) -> str | dict:
+        return report_to_json(report)
+
+    def write_record(self, record: str | dict) -> None:
+        self.fob.write(json.dumps(record) + "\n")
+
+
+def _sarif_region(record: dict) -> dict | None:
+    line = record.get("line")
+    if not line:
+        return None
+    region: dict[str, int] = {}
+    if isinstance(line, list):
+        region["startLine"], region["endLine"] = line
+    else:
+        region["startLine"] = line
+    # columns are interpreted as they're shown in the terminal, single
+    # columns count from 0, spans from 1 (and include their end)
+    column = record.get("column")
+    if isinstance(column, list):
+        region["startColumn"] = column[0]
+        region["endColumn"] = column[1] + 1
+    elif isinstance(column, int) and not isinstance(line, list):
+        region["startColumn"] = column + 1
+    return region
+
+
+def sarif_rule_id(record: dict) -> str:
+    """
+    Return id of the sarif rule a record is a result of
+
+    "source/symbol" (e.g. "ruff/F401"), or just the source if the report has
+    no symbol (see `report_symbol`)
+    """
+    symbol = record.get("symbol")
+    if symbol is None:
+        return record["source"]
+    return f"{record['source']}/{symbol}"
+
+
+def sarif_result(record: dict) -> dict:
+    """Convert `SarifWriter.record` output to a sarif result"""
+    item = record["item"]
+    if "abspath" in item:
+        location: dict = {
+            "physicalLocation": {
+                "artifactLocation": {"uri": Path(item["abspath"]).as_uri()}
+            }
+        }
+        region = _sarif_region(record)
+        if region is not None:
+            location["physicalLocation"]["region"] = region
+    else:
+        location = {
+            "logicalLocations": [{"name": item["value"], "kind": "package"}]
+        }
+    properties = {"level": record["level"]}
+    if record["location_metadata"]:
+        properties["locationMetadata"] = record["location_metadata"]
+    if record["fix"]:
+        properties["fix"] = record["fix"]
+    return {
+        "ruleId": sarif_rule_id(record),
+        "level": _SARIF_LEVELS[record["level"]],
+        "message": {"text": record["message"]},
+        "locations": [location],
+        "properties": properties,
+    }
+
+
+class SarifWriter(ReportWriter):
+    """
+    Writes a sarif log
+
+    Results are written as they arrive, the tool & its rules (one per report
+    source & symbol, see `sarif_rule_id`) follow them once every report is
+    written
+    """
+
+    FORMAT: ClassVar[str] = "sarif"
+
+    def __init__(self, fob: TextIO) -> None:
+        super().__init__(fob)
+        self._rules: set[str] = set()
+        self._first = True
+
+    @staticmethod
+    def record(report: Report) -> str | dict:
+        return {**report_to_json(report), "symbol": report_symbol(report)}
+
+    def begin(self) -> None:
+        self.fob.write(
+            "{"
+            f'"version": {json.dumps(SARIF_VERSION)}, '
+            f'"$schema": {json.dumps(SARIF_SCHEMA)}, '
+            '"runs": [{"results": [\n'
+        )
+
+    def write_record(self, record: str | dict) -> None:
+        assert isinstance(record, dict)
+        result = sarif_result(record)
+        self._rules.add(result["ruleId"])
+        if not self._first:
+            self.fob.write(",\n")
+        self._first = False
+        self.fob.write(json.dumps(result))
+
+    def end(self) -> None:
+        tool = {
+            "driver": {
+                "name": "tkldev-detective",
+                "informationUri": INFORMATION_URI,
+                "rules": [{"id": rule} for rule in sorted(self._rules)],
+            }
+        }
+        self.fob.write(f'\n], "tool": {json.dumps(tool)}}}]}}\n')
+        super().end()
+
+
+WRITERS: dict[str, type[ReportWriter]] = {
+    writer.FORMAT: writer
+    for writer in (TextWriter, JsonLinesWriter, SarifWriter)
+}
+"writer of each output format"
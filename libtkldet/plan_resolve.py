@@ -17,7 +17,9 @@
 
 """very naive cpp parser for plan parsing"""
 
+import os
 from dataclasses import dataclass
+from functools import lru_cache
 from os.path import isfile, join
 
 from .error import (
@@ -92,6 +94,23 @@ def _remove_multiline_comments(raw: str) -> str:
     return out
 
 
+@lru_cache(maxsize=1024)
+def _read_plan_cached(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, "r") as fob:
+        return _remove_multiline_comments(fob.read())
+
+
+def _read_plan(path: str) -> str:
+    """
+    Read plan with multiline comments removed
+
+    Cached for as long as the file is unchanged, as the same common plans are
+    included by many plans & appliances
+    """
+    st = os.stat(path)
+    return _read_plan_cached(path, st.st_mtime_ns, st.st_size)
+
+
 # ignoring lints in this function:
 # - C901 (too complex), breaking this down further
 #       would obfuscate what it does
@@ -127,8 +146,7 @@ def _parse_plan(  # noqa: C901, PLR0912
     # is "true".
     cond_stack: list[bool] = []
 
-    with open(path, "r") as fob:
-        data = _remove_multiline_comments(fob.read())
+    data = _read_plan(path)
 
     for line in data.splitlines():
         # remove single line comment
@@ -29,7 +29,9 @@ from enum import Enum
 from typing import ClassVar
 
 from . import colors as co
+from . import metrics, timing
 from .classifier import FileItem, Item
+from .error import FilterError
 from .hint_extract import format_extract
 
 
@@ -251,6 +253,29 @@ class FileReport(Report):
         }
 
 
+@dataclass(frozen=True)
+class FailureReport(FileReport):
+    """
+    Report that a tool failed to check a file
+
+    Rather than an issue with the file itself, so never cached (the failure
+    may not happen next time)
+    """
+
+
+def report_symbol(report: Report) -> str | None:
+    """
+    Return symbol of the issue a report is for, if known
+
+    Taken from the report's raw data, e.g. pylint's `import-error` or ruff &
+    shellcheck's codes
+    """
+    if not report.raw:
+        return None
+    symbol = report.raw.get("symbol", report.raw.get("code"))
+    return None if symbol is None else str(symbol)
+
+
 class ReportFilter:
     """
     A filter to change reports before presenting
@@ -261,6 +286,23 @@ class ReportFilter:
 
     WEIGHT: ClassVar[int] = 100
 
+    SOURCES: ClassVar[set[str]] = set()
+    "sources of reports to filter, all if empty"
+
+    SYMBOLS: ClassVar[set[str]] = set()
+    "symbols (see `report_symbol`) of reports to filter, all if empty"
+
+    def handles(self, source: str, symbol: str | None) -> bool:
+        """
+        Check if reports with a given source & symbol should be filtered
+
+        Checks `SOURCES` & `SYMBOLS` by default, result is cached per source
+        & symbol, reports which aren't handled skip this filter entirely
+        """
+        if self.SOURCES and source not in self.SOURCES:
+            return False
+        return not self.SYMBOLS or symbol in self.SYMBOLS
+
     def filter(self, report: Report) -> Iterator[Report]:
         """
         Given a report filter or modify it
@@ -273,6 +315,16 @@ class ReportFilter:
         """
         raise NotImplementedError
 
+    def filter_batch(self, reports: list[Report]) -> list[list[Report]]:
+        """
+        Filter every handled report at once
+
+        Returns a list of the reports replacing each report given, in the
+        same order. Calls `filter` on each report by default, filters which
+        can process many reports at once more efficiently may override this
+        """
+        return [list(self.filter(report)) for report in reports]
+
 
 _FILTERS: list[type[ReportFilter]] = []
 
@@ -294,16 +346,76 @@ def get_weighted_filters() -> list[ReportFilter]:
     )
 
 
-def filter_all_reports(reports: Iterable[Report]) -> Iterator[Report]:
-    """Filter all reports through all filters in order of weight"""
+def _filter_group(
+    filters: list[ReportFilter],
+    handled: list[dict[tuple[str, str | None], bool]],
+    reports: list[Report],
+) -> list[Report]:
+    for filt, filt_handled in zip(filters, handled):
+        name = filt.__class__.__name__
+        indices = []
+        for i, report in enumerate(reports):
+            key = (report.source, report_symbol(report))
+            if key not in filt_handled:
+                filt_handled[key] = filt.handles(*key)
+            if filt_handled[key]:
+                indices.append(i)
+        metrics.count("filter", name, skipped=len(reports) - len(indices))
+        if not indices:
+            continue
+
+        batch = [reports[i] for i in indices]
+        with timing.timed(f"filter:{name}"), metrics.measure("filter", name):
+            results = filt.filter_batch(batch)
+        if len(results) != len(batch):
+            error_message = (
+                f"{name}.filter_batch returned {len(results)} results for"
+                f" {len(batch)} reports"
+            )
+            raise FilterError(error_message)
+        metrics.count(
+            "filter",
+            name,
+            checked=len(batch),
+            reports=sum(map(len, results)),
+        )
+
+        filtered: list[Report] = []
+        start = 0
+        for i, result in zip(indices, results):
+            filtered.extend(reports[start:i])
+            filtered.extend(result)
+            start = i + 1
+        filtered.extend(reports[start:])
+        reports = filtered
+    return reports
+
+
+def filter_report_groups(
+    groups: Iterable[list[Report]],
+) -> Iterator[list[Report]]:
+    """
+    Filter groups of reports (e.g. the reports of each item) through all
+    filters in order of weight
+
+    Each group is filtered as soon as it arrives, each filter is given every
+    report of the group it handles at once, reports it doesn't handle are
+    passed on untouched. Order of reports is kept, reports produced by a
+    filter take the place of the report they replace. Groups left empty are
+    skipped
+    """
     filters = get_weighted_filters()
+    handled: list[dict[tuple[str, str | None], bool]] = [
+        {} for _ in filters
+    ]
+    for group in groups:
+        with timing.timed("filter"):
+            filtered = _filter_group(filters, handled, group)
+        if filtered:
+            yield filtered
+
 
-    for report in reports:
-        reports_curr = [report]
-        reports_next = []
-        for filt in filters:
-            for c_report in reports_curr:
-                reports_next.extend(filt.filter(c_report))
-            reports_curr = reports_next
-            reports_next = []
-        yield from reports_curr
+def filter_all_reports(reports: Iterable[Report]) -> Iterator[Report]:
+    """Filter all reports through all filters in order of weight"""
+    for group in filter_report_groups([report] for report in reports):
+        yield from group
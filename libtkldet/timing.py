@@ -0,0 +1,98 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Timing of each phase of a run
+
+Disabled unless `enable` is called, in which case `timed` blocks accumulate
+the time spent in them under a phase name
+"""
+
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import TextIO
+
+from . import colors as co
+
+_ENABLED = False
+_STARTED = 0.0
+_LOCK = threading.Lock()
+_TOTALS: dict[str, float] = {}
+_CALLS: dict[str, int] = {}
+
+_DISABLED = nullcontext()
+
+
+def enable() -> None:
+    """Start recording phase timings"""
+    global _ENABLED, _STARTED
+    _ENABLED = True
+    _STARTED = time.perf_counter()
+
+
+def is_enabled() -> bool:
+    """Check if phase timings are being recorded"""
+    return _ENABLED
+
+
+def add(name: str, seconds: float) -> None:
+    """Add time spent in phase `name`"""
+    with _LOCK:
+        _TOTALS[name] = _TOTALS.get(name, 0.0) + seconds
+        _CALLS[name] = _CALLS.get(name, 0) + 1
+
+
+@contextmanager
+def _timed(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> AbstractContextManager[None]:
+    """Time a block as part of phase `name` (does nothing if disabled)"""
+    if not _ENABLED:
+        return _DISABLED
+    return _timed(name)
+
+
+def print_summary(file: TextIO = sys.stderr) -> None:
+    """
+    Print time spent in each phase
+
+    Phases are nested (e.g. each linter's time is included in "lint") and,
+    when running in parallel, may add up to more than the total wall time
+    """
+    total = time.perf_counter() - _STARTED
+    print(co.BOLD + "profile:" + co.RESET, file=file)
+    with _LOCK:
+        totals = sorted(_TOTALS.items(), key=lambda x: x[0])
+        calls = dict(_CALLS)
+    width = max((len(name) for name, _ in totals), default=0)
+    for name, seconds in totals:
+        percent = seconds / total * 100 if total else 0.0
+        print(
+            f"  {name:<{width}}  {seconds:9.3f}s  {percent:5.1f}%"
+            f"  {calls[name]:>7} calls",
+            file=file,
+        )
+    print(f"  {'total':<{width}}  {total:9.3f}s", file=file)
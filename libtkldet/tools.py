@@ -0,0 +1,180 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Detection of external tools on the HOST system (tkldev)
+
+Nothing is checked until first asked for, installed packages are read
+directly from dpkg's database and executables are found without running
+anything, so checking for tools doesn't slow down startup
+"""
+
+import os
+import subprocess
+from dataclasses import dataclass
+from functools import cache
+from os.path import realpath
+from shutil import which
+
+DPKG_STATUS = "/var/lib/dpkg/status"
+DPKG_INFO = "/var/lib/dpkg/info"
+
+
+@cache
+def installed_packages() -> dict[str, str]:
+    """Return mapping of installed package names to their versions"""
+    packages: dict[str, str] = {}
+    package = version = ""
+    installed = False
+    try:
+        with open(DPKG_STATUS, "r", errors="replace") as fob:
+            for line in fob:
+                if line == "\n":
+                    if installed and package:
+                        packages[package] = version
+                    package = version = ""
+                    installed = False
+                elif line.startswith("Package: "):
+                    package = line[9:].strip()
+                elif line.startswith("Version: "):
+                    version = line[9:].strip()
+                elif line.startswith("Status: "):
+                    installed = line.split()[-1] == "installed"
+    except OSError:
+        return packages
+    if installed and package:
+        packages[package] = version
+    return packages
+
+
+def is_installed(package_name: str) -> bool:
+    """Check if a given package is installed on the HOST system (tkldev)"""
+    return package_name in installed_packages()
+
+
+@cache
+def find_executable(name: str) -> str | None:
+    """Return path of executable (as `which` would), None if not found"""
+    return which(name)
+
+
+def is_in_path(name: str) -> bool:
+    """Check if a given name is in the path"""
+    return find_executable(name) is not None
+
+
+@cache
+def package_files(package_name: str) -> frozenset[str]:
+    """Return paths of files installed by a package"""
+    for name in (package_name, *_arch_qualified(package_name)):
+        try:
+            with open(os.path.join(DPKG_INFO, f"{name}.list"), "r") as fob:
+                return frozenset(line.rstrip("\n") for line in fob)
+        except OSError:
+            continue
+    return frozenset()
+
+
+def _arch_qualified(package_name: str) -> list[str]:
+    try:
+        return [
+            name[:-5]
+            for name in os.listdir(DPKG_INFO)
+            if name.startswith(package_name + ":") and name.endswith(".list")
+        ]
+    except OSError:
+        return []
+
+
+@cache
+def tool_version(*command: str) -> str:
+    """Return output of a version command (e.g. `ruff --version`), cached"""
+    try:
+        ret = subprocess.run(command, capture_output=True, text=True)
+    except OSError:
+        return ""
+    return ret.stdout.strip()
+
+
+@dataclass(frozen=True)
+class Tool:
+    """An external tool, optionally provided by a debian package"""
+
+    name: str
+    "name of executable"
+
+    package: str | None = None
+    "debian package providing tool"
+
+    version_args: tuple[str, ...] = ("--version",)
+    "arguments which make tool print its version"
+
+    @property
+    def path(self) -> str | None:
+        """Path to tool's executable, None if not in path"""
+        return find_executable(self.name)
+
+    def is_available(self) -> bool:
+        """
+        Check if tool's executable is in the path
+
+        Having its package installed isn't enough, as the executable is what
+        gets run
+        """
+        return self.path is not None
+
+    def version(self) -> str:
+        """
+        Return version of tool, for use in cache keys
+
+        If the executable in use belongs to the tool's package, the package
+        version is used, otherwise the tool itself is asked
+        """
+        path = self.path
+        if path is None:
+            return ""
+        if self.package is not None and is_installed(self.package):
+            files = package_files(self.package)
+            if path in files or realpath(path) in files:
+                version = installed_packages()[self.package]
+                return f"{self.package} {version}"
+        return tool_version(path, *self.version_args)
+
+
+_TOOLS: dict[str, Tool] = {}
+
+
+def register_tool(
+    name: str,
+    package: str | None = None,
+    version_args: tuple[str, ...] = ("--version",),
+) -> Tool:
+    """
+    Register an external tool
+
+    Registering is free, the tool isn't looked for until it's asked about
+    """
+    tool = Tool(name, package, version_args)
+    _TOOLS[name] = tool
+    return tool
+
+
+def get_tool(name: str) -> Tool:
+    """Return a registered tool (registering it if required)"""
+    if name not in _TOOLS:
+        return register_tool(name)
+    return _TOOLS[name]
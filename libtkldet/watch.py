@@ -0,0 +1,181 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Watches appliances for changes
+
+Uses inotify (via libc) so no further dependencies are required
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from collections.abc import Iterator
+from logging import getLogger
+from os.path import isdir, join
+
+from .error import WatchError
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_IGNORED = 0x00008000
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+DEBOUNCE = 0.1
+"seconds to wait for further events before reporting changes"
+
+_EVENT = struct.Struct("iIII")
+
+logger = getLogger(__name__)
+
+
+class Inotify:
+    """Minimal wrapper around inotify file descriptors"""
+
+    def __init__(self) -> None:
+        try:
+            self._libc = ctypes.CDLL(
+                ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+            )
+            self._libc.inotify_add_watch.argtypes = [
+                ctypes.c_int,
+                ctypes.c_char_p,
+                ctypes.c_uint32,
+            ]
+            self.fd = self._libc.inotify_init1(IN_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            error_message = "inotify is not available on this system"
+            raise WatchError(error_message) from e
+        if self.fd < 0:
+            error_message = (
+                f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}"
+            )
+            raise WatchError(error_message)
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """Watch path for events in mask, returns watch descriptor"""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error_message = (
+                f"couldn't watch {path}: {os.strerror(ctypes.get_errno())}"
+            )
+            raise WatchError(error_message)
+        return wd
+
+    def read_events(
+        self, timeout: float | None = None
+    ) -> list[tuple[int, int, str]]:
+        """
+        Read pending events, waiting at most `timeout` seconds for them
+
+        Returns list of (watch descriptor, mask, name) tuples
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        """Close inotify file descriptor"""
+        os.close(self.fd)
+
+
+class ApplianceWatcher:
+    """
+    Watches files of an appliance
+
+    Watches the appliance root, conf.d and plan directories as well as the
+    entire overlay (including directories created while watching)
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._inotify = Inotify()
+        self._dirs: dict[int, str] = {}
+        for path in (root, join(root, "conf.d"), join(root, "plan")):
+            if isdir(path):
+                self._watch_dir(path)
+        self._watch_tree(join(root, "overlay"))
+
+    def _watch_dir(self, path: str) -> None:
+        self._dirs[self._inotify.add_watch(path, WATCH_MASK)] = path
+
+    def _watch_tree(self, path: str) -> list[str]:
+        """Watch directory tree, returns files already inside it"""
+        files = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [name for name in dirnames if name != ".git"]
+            self._watch_dir(dirpath)
+            files.extend(join(dirpath, name) for name in filenames)
+        return files
+
+    def _overlay_dir(self, path: str) -> bool:
+        overlay = join(self.root, "overlay")
+        return path == overlay or path.startswith(overlay + "/")
+
+    def changes(self, debounce: float = DEBOUNCE) -> Iterator[set[str]]:
+        """
+        Yield sets of paths which have been written to
+
+        Events arriving within `debounce` seconds of each other are grouped
+        together, so saving many files at once only yields once
+        """
+        while True:
+            changed: set[str] = set()
+            events = self._inotify.read_events()
+            while events:
+                for wd, mask, name in events:
+                    if mask & IN_Q_OVERFLOW:
+                        logger.warning("inotify queue overflowed")
+                        continue
+                    if mask & IN_IGNORED or wd not in self._dirs:
+                        self._dirs.pop(wd, None)
+                        continue
+                    path = join(self._dirs[wd], name)
+                    if mask & IN_ISDIR:
+                        if self._overlay_dir(path) or path in (
+                            join(self.root, "conf.d"),
+                            join(self.root, "plan"),
+                        ):
+                            # files may already exist by the time the watch
+                            # is added, so treat them as changed too
+                            changed.update(self._watch_tree(path))
+                    elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        changed.add(path)
+                events = self._inotify.read_events(debounce)
+            if changed:
+                yield changed
+
+    def close(self) -> None:
+        """Stop watching"""
+        self._inotify.close()
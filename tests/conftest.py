@@ -0,0 +1,76 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Shared test setup, makes libtkldet & tkldet_modules importable"""
+
+import importlib.machinery
+import importlib.util
+import sys
+from os.path import abspath, dirname, join
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+ROOT = dirname(dirname(abspath(__file__)))
+SCRIPT = join(ROOT, "tkldev-detective")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from libtkldet.classifier import FileItem  # noqa: E402
+from libtkldet.report import FileReport, ReportLevel  # noqa: E402
+
+
+def make_item(tmp_path: Path, name: str, text: str = "") -> FileItem:
+    """Write file `name` under tmp_path, return it as an item"""
+    path = tmp_path / name
+    path.write_text(text)
+    return FileItem.from_path(str(path), str(tmp_path))
+
+
+def make_report(
+    item: FileItem,
+    message: str = "message",
+    source: str = "test",
+    raw: dict | None = None,
+    line: int | tuple[int, int] | None = 1,
+    column: int | tuple[int, int] | None = None,
+) -> FileReport:
+    """Create a warning about item"""
+    return FileReport(
+        item=item,
+        location_metadata=None,
+        message=message,
+        fix=None,
+        source=source,
+        level=ReportLevel.WARN,
+        raw=raw,
+        line=line,
+        column=column,
+    )
+
+
+@pytest.fixture
+def script() -> ModuleType:
+    """The tkldev-detective script, loaded as a module"""
+    loader = importlib.machinery.SourceFileLoader("tkldev_detective", SCRIPT)
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    assert spec is not None
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
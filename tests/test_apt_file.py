@@ -0,0 +1,128 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for the apt Contents index"""
+
+import gzip
+import random
+from pathlib import Path
+
+import pytest
+
+from libtkldet import apt_file
+from libtkldet.apt_file import ContentsIndex
+
+CONTENTS = [
+    ("/etc/apache2/apache2.conf", "httpd/apache2"),
+    ("/usr/bin/python3", "python/python3-minimal"),
+    ("/usr/bin/python3.11", "python/python3.11-minimal"),
+    ("/usr/bin/shellcheck", "devel/shellcheck"),
+    ("/usr/lib/python3/dist-packages/yaml/__init__.py", "python/python3-yaml"),
+    ("/usr/lib/python3/dist-packages/yaml/loader.py", "python/python3-yaml"),
+    ("/usr/share/doc/common/README", "doc/pkg-a,doc/pkg-b"),
+    ("/var/www/index.html", "httpd/apache2"),
+]
+
+
+def write_index(tmp_path: Path, entries: list[tuple[str, str]]) -> str:
+    path = tmp_path / "index"
+    path.write_bytes(
+        b"".join(
+            f"{name}\t{locations}\n".encode()
+            for name, locations in sorted(entries)
+        )
+    )
+    return str(path)
+
+
+def test_iter_prefix(tmp_path: Path) -> None:
+    index = ContentsIndex(write_index(tmp_path, CONTENTS))
+    assert list(index.iter_prefix("/usr/bin/python3")) == [
+        ("/usr/bin/python3", ["python3-minimal"]),
+        ("/usr/bin/python3.11", ["python3.11-minimal"]),
+    ]
+    assert list(index.iter_prefix("/etc/apache2/")) == [
+        ("/etc/apache2/apache2.conf", ["apache2"])
+    ]
+    assert list(index.iter_prefix("/var/www/index.html")) == [
+        ("/var/www/index.html", ["apache2"])
+    ]
+    assert list(index.iter_prefix("/usr/share/doc/common/")) == [
+        ("/usr/share/doc/common/README", ["pkg-a", "pkg-b"])
+    ]
+    assert not list(index.iter_prefix("/usr/bin/pz"))
+    assert not list(index.iter_prefix("/zzz"))
+    assert not list(index.iter_prefix("/a"))
+
+
+def test_iter_prefix_matches_linear_scan(tmp_path: Path) -> None:
+    rng = random.Random(0)
+    names = {
+        "/" + "/".join(
+            "".join(rng.choice("abc") for _ in range(rng.randint(1, 3)))
+            for _ in range(rng.randint(1, 4))
+        )
+        for _ in range(500)
+    }
+    index = ContentsIndex(
+        write_index(tmp_path, [(name, "misc/pkg") for name in names])
+    )
+    prefixes = ["/", "/a", "/ab/", "/c/c", "/b/a/cc", "/ccc/ccc/ccc/ccc/c"]
+    prefixes += rng.sample(sorted(names), 20)
+    for prefix in prefixes:
+        expected = sorted(name for name in names if name.startswith(prefix))
+        assert [name for name, _ in index.iter_prefix(prefix)] == expected
+
+
+def test_search(tmp_path: Path) -> None:
+    index = ContentsIndex(write_index(tmp_path, CONTENTS))
+    assert index.search(r"/usr/bin/python3(\.\d+)?$") == [
+        "python3-minimal",
+        "python3.11-minimal",
+    ]
+    assert index.search(
+        r"/usr/lib/python3/dist-packages/yaml(/__init__)?\.py$"
+    ) == ["python3-yaml"]
+    assert index.search(r"/usr/bin/missing$") == []
+    # no literal prefix to binary search for
+    assert index.search(r".*/python3$") is None
+
+
+def test_empty_index(tmp_path: Path) -> None:
+    index = ContentsIndex(write_index(tmp_path, []))
+    assert index.search(r"/usr/bin/python3$") == []
+
+
+def test_build_contents_index(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(apt_file, "APT_HELPER", str(tmp_path / "missing"))
+    contents = tmp_path / "Contents-amd64.gz"
+    with gzip.open(contents, "wt") as fob:
+        fob.write("FILE LOCATION\n")
+        for name, locations in reversed(CONTENTS):
+            fob.write(f"{name[1:]}    {locations}\n")
+    index_path = str(tmp_path / "index")
+    apt_file._build_contents_index([str(contents)], index_path)
+    index = ContentsIndex(index_path)
+    assert [name for name, _ in index.iter_prefix("/")] == [
+        name for name, _ in CONTENTS
+    ]
+    assert index.search(r"/usr/share/doc/common/README$") == [
+        "pkg-a",
+        "pkg-b",
+    ]
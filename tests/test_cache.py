@@ -0,0 +1,163 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for the on-disk result cache"""
+
+import multiprocessing
+from multiprocessing.synchronize import Event
+from pathlib import Path
+
+from conftest import make_item, make_report
+
+from libtkldet.cache import ResultCache, open_cache
+from libtkldet.classifier import FileItem
+from libtkldet.linter import FileLinter
+from libtkldet.report import FailureReport, ReportLevel
+
+
+class CachedLinter(FileLinter):
+    ENABLE_TAGS = set()
+    DISABLE_TAGS = set()
+
+    def cache_key(self) -> str | None:
+        return "test 1.0"
+
+
+def test_put_get_roundtrip(tmp_path: Path) -> None:
+    item = make_item(tmp_path, "a.sh", "echo a\n")
+    cache = ResultCache(str(tmp_path / "cache"))
+    cache.put(CachedLinter(), item, [make_report(item, "hello")])
+    cache.close()
+
+    cache = ResultCache(str(tmp_path / "cache"))
+    reports = cache.get(CachedLinter(), item)
+    cache.close()
+    assert reports is not None
+    assert [report.message for report in reports] == ["hello"]
+
+
+def test_changed_file_misses(tmp_path: Path) -> None:
+    item = make_item(tmp_path, "a.sh", "echo a\n")
+    cache = ResultCache(str(tmp_path / "cache"))
+    cache.put(CachedLinter(), item, [make_report(item, "hello")])
+    changed = make_item(tmp_path, "a.sh", "echo changed\n")
+    assert cache.get(CachedLinter(), changed) is None
+    cache.close()
+
+
+def test_failure_report_not_cached(tmp_path: Path) -> None:
+    item = make_item(tmp_path, "a.sh", "echo a\n")
+    failure = FailureReport(
+        item=item,
+        location_metadata=None,
+        message="test failed to check file",
+        fix=None,
+        source="test",
+        level=ReportLevel.ERROR,
+    )
+    cache = ResultCache(str(tmp_path / "cache"))
+    cache.put(CachedLinter(), item, [make_report(item, "hello"), failure])
+    assert cache.get(CachedLinter(), item) is None
+    assert cache.stats().entries == 0
+    cache.close()
+
+
+def test_item_cache_key_change_misses(tmp_path: Path) -> None:
+    class ConfiguredLinter(CachedLinter):
+        config = "a"
+
+        def item_cache_key(self, item: FileItem) -> str:
+            return self.config
+
+    item = make_item(tmp_path, "a.sh", "echo a\n")
+    linter = ConfiguredLinter()
+    cache = ResultCache(str(tmp_path / "cache"))
+    cache.put(linter, item, [make_report(item, "hello")])
+    assert cache.get(linter, item) is not None
+    linter.config = "b"
+    assert cache.get(linter, item) is None
+    cache.close()
+
+
+def test_open_cache_unavailable(tmp_path: Path) -> None:
+    # a file where a directory is expected, as root can write anywhere
+    (tmp_path / "not-a-dir").write_text("")
+    assert open_cache(str(tmp_path / "not-a-dir" / "cache")) is None
+
+
+def test_two_open_caches_can_write(tmp_path: Path) -> None:
+    cache_dir = str(tmp_path / "cache")
+    first_item = make_item(tmp_path, "a.sh", "echo a\n")
+    second_item = make_item(tmp_path, "b.sh", "echo b\n")
+
+    first = ResultCache(cache_dir)
+    second = ResultCache(cache_dir)
+    first.put(CachedLinter(), first_item, [make_report(first_item, "a")])
+    # must not wait for `first` to be closed
+    second._db.execute("PRAGMA busy_timeout = 1000")
+    second.put(CachedLinter(), second_item, [make_report(second_item, "b")])
+
+    # each sees the other's results while both are still open
+    assert second.get(CachedLinter(), first_item) is not None
+    assert first.get(CachedLinter(), second_item) is not None
+    first.close()
+    second.close()
+
+
+def _write_from_process(
+    cache_dir: str, tmp_dir: str, name: str, ready: Event, done: Event
+) -> None:
+    cache = ResultCache(cache_dir)
+    cache._db.execute("PRAGMA busy_timeout = 5000")
+    item = make_item(Path(tmp_dir), name, f"echo {name}\n")
+    cache.put(CachedLinter(), item, [make_report(item, name)])
+    ready.set()
+    # keep the cache open until every process has written
+    done.wait(10)
+    cache.close()
+
+
+def test_processes_share_cache(tmp_path: Path) -> None:
+    cache_dir = str(tmp_path / "cache")
+    # create the database before workers race to
+    ResultCache(cache_dir).close()
+    ctx = multiprocessing.get_context("fork")
+    done = ctx.Event()
+    workers = []
+    for name in ("a.sh", "b.sh", "c.sh"):
+        ready = ctx.Event()
+        process = ctx.Process(
+            target=_write_from_process,
+            args=(cache_dir, str(tmp_path), name, ready, done),
+        )
+        process.start()
+        workers.append((name, process, ready))
+
+    for name, _, ready in workers:
+        assert ready.wait(10), f"{name} couldn't write while others were open"
+    done.set()
+    for _, process, _ in workers:
+        process.join(10)
+        assert process.exitcode == 0
+
+    cache = ResultCache(cache_dir)
+    for name, _, _ in workers:
+        item = FileItem.from_path(str(tmp_path / name), str(tmp_path))
+        reports = cache.get(CachedLinter(), item)
+        assert reports is not None
+        assert [report.message for report in reports] == [name]
+    cache.close()
@@ -0,0 +1,135 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for indexing path classifiers into a single lookup"""
+
+import random
+
+from libtkldet.classifier import (
+    Classifier,
+    ExactPathClassifier,
+    FileClassifier,
+    FileItem,
+    Item,
+    PathRuleClassifier,
+    SubdirClassifier,
+    compile_classifiers,
+)
+
+
+def exact(name: str, path: str) -> Classifier:
+    cls = type(
+        name, (ExactPathClassifier,), {"path": path, "tags": [name.lower()]}
+    )
+    return cls()
+
+
+def subdir(name: str, path: str, recursive: bool) -> Classifier:
+    cls = type(
+        name,
+        (SubdirClassifier,),
+        {"path": path, "recursive": recursive, "tags": [name.lower()]},
+    )
+    return cls()
+
+
+class ShebangLike(FileClassifier):
+    def classify(self, item: Item) -> None:
+        item.add_tags(self, ["shebang"])
+
+
+CLASSIFIERS = [
+    exact("Makefile", "Makefile"),
+    subdir("ConfD", "conf.d", False),
+    subdir("Overlay", "overlay", True),
+    subdir("OverlayEtc", "overlay/etc", True),
+    exact("OverlayEtcExact", "overlay/etc"),
+    subdir("InithookBin", "overlay/usr/lib/inithooks/bin", False),
+    subdir("Inithooks", "overlay/usr/lib/inithooks", True),
+    subdir("Plan", "plan", False),
+]
+
+PATHS = [
+    "Makefile",
+    "Makefile.bak",
+    "conf.d/main",
+    "conf.d/sub/main",
+    "overlay/",
+    "overlay/etc",
+    "overlay/etc/apache2/sites-available/default.conf",
+    "overlay/usr/lib/inithooks/bin/x.py",
+    "overlay/usr/lib/inithooks/firstboot.d/10x",
+    "plan/main",
+    "planx/main",
+    "README.rst",
+]
+
+
+def classified(classifiers: list[Classifier], relpath: str) -> dict:
+    item = FileItem.from_path(f"/app/{relpath}", "/app")
+    for classifier in classifiers:
+        classifier.do_classify(item)
+    # tags keep the order they were added in
+    return {name: sorted(tags) for name, tags in item._tags.items()}
+
+
+def test_path_rules_match_individual_classifiers() -> None:
+    compiled = PathRuleClassifier(CLASSIFIERS)
+    for path in PATHS:
+        assert classified([compiled], path) == classified(CLASSIFIERS, path)
+
+
+def test_recursive_subdirs_match_whole_components() -> None:
+    compiled = PathRuleClassifier(CLASSIFIERS)
+    matches = compiled.match("overlay/usr/lib/inithooksx/bin/x.py")
+    assert [type(c).__name__ for c in matches] == ["Overlay"]
+
+
+def test_path_rules_match_random_paths() -> None:
+    rng = random.Random(0)
+    parts = ["overlay", "etc", "usr", "lib", "inithooks", "bin", "conf.d"]
+    compiled = PathRuleClassifier(CLASSIFIERS)
+    for _ in range(500):
+        path = "/".join(rng.choice(parts) for _ in range(rng.randint(1, 6)))
+        path += "/" + rng.choice(["main", "x.py", "Makefile"])
+        assert classified([compiled], path) == classified(CLASSIFIERS, path)
+
+
+def test_compile_replaces_path_classifiers() -> None:
+    shebang = ShebangLike()
+
+    class CustomSubdir(SubdirClassifier):
+        path = "overlay"
+        recursive = True
+        tags = ["custom"]
+
+        def classify(self, item: Item) -> None:
+            item.add_tags(self, ["custom"])
+
+    custom = CustomSubdir()
+    classifiers = [shebang, *CLASSIFIERS[:3], custom, *CLASSIFIERS[3:]]
+    compiled = compile_classifiers(classifiers)
+    assert compiled[0] is shebang
+    assert isinstance(compiled[1], PathRuleClassifier)
+    assert compiled[1].classifiers == CLASSIFIERS
+    # classifiers overriding classify can't be indexed
+    assert compiled[2:] == [custom]
+
+
+def test_compile_without_path_classifiers() -> None:
+    classifiers: list[Classifier] = [ShebangLike()]
+    assert compile_classifiers(classifiers) == classifiers
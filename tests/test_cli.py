@@ -0,0 +1,33 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+"""Tests for the tkldev-detective command line"""
+
+from argparse import ArgumentTypeError
+from types import ModuleType
+
+import pytest
+
+
+def test_job_count(script: ModuleType) -> None:
+    assert script.job_count("0") == 0
+    assert script.job_count("4") == 4
+
+
+@pytest.mark.parametrize("value", ["-1", "x"])
+def test_invalid_job_count(script: ModuleType, value: str) -> None:
+    with pytest.raises((ArgumentTypeError, ValueError)):
+        script.job_count(value)
@@ -0,0 +1,60 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+"""Tests for the per run cache of file contents"""
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from libtkldet import file_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_content_cache() -> Iterator[None]:
+    file_cache.clear()
+    yield
+    file_cache.clear()
+
+
+def test_head_of_uncached_file_is_not_cached(tmp_path: Path) -> None:
+    path = tmp_path / "script"
+    path.write_bytes(b"#!/bin/sh\n" + b"x" * 4096)
+    assert file_cache.get_head(str(path), 10) == b"#!/bin/sh\n"
+    assert not file_cache._CACHE
+
+
+def test_head_of_cached_file(tmp_path: Path) -> None:
+    path = tmp_path / "script"
+    path.write_bytes(b"#!/bin/sh\necho hi\n")
+    content = file_cache.get_content(str(path))
+    assert content is not None
+    assert file_cache.get_head(str(path), 10) == b"#!/bin/sh\n"
+
+
+def test_head_of_changed_file(tmp_path: Path) -> None:
+    path = tmp_path / "script"
+    path.write_bytes(b"#!/bin/sh\n")
+    assert file_cache.get_content(str(path)) is not None
+    path.write_bytes(b"#!/usr/bin/python3\n")
+    os.utime(path, ns=(0, 0))
+    assert file_cache.get_head(str(path), 18) == b"#!/usr/bin/python3"
+
+
+def test_head_of_missing_file(tmp_path: Path) -> None:
+    assert file_cache.get_head(str(tmp_path / "missing"), 10) is None
@@ -0,0 +1,127 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for converting offsets into files to lines & columns"""
+
+import mmap
+import random
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from libtkldet import file_cache
+from libtkldet.file_util import (
+    position_from_byte_offset,
+    position_from_char_offset,
+    positions_from_byte_offsets,
+    positions_from_char_offsets,
+)
+
+TEXTS = {
+    "plain": "a = 1\nb = 2\n",
+    "no_newline": "first\nsecond",
+    "empty": "",
+    "blank_lines": "\n\n\nx\n\n",
+    "multibyte": "naïve = 'ü'\n# ☃ snow\nend\n",
+    "crlf": "one\r\ntwo\r\nthree\r\n",
+}
+
+
+def scan_position(data: str | bytes, offset: int) -> tuple[int, int] | None:
+    """Position of offset, found by scanning as file_util used to"""
+    newline = "\n" if isinstance(data, str) else ord("\n")
+    line = col = 0
+    for i, char in enumerate(data):
+        if i == offset:
+            return line, col
+        if char == newline:
+            line += 1
+            col = 0
+        else:
+            col += 1
+    return None
+
+
+@pytest.fixture(autouse=True)
+def clear_content_cache() -> Iterator[None]:
+    file_cache.clear()
+    yield
+    file_cache.clear()
+
+
+def write(tmp_path: Path, name: str) -> tuple[str, str, bytes]:
+    path = tmp_path / name
+    data = TEXTS[name].encode()
+    path.write_bytes(data)
+    with open(path) as fob:
+        text = fob.read()
+    return str(path), text, data
+
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_char_offsets(tmp_path: Path, name: str) -> None:
+    path, text, _ = write(tmp_path, name)
+    offsets = [-1, *range(len(text) + 2)]
+    expected = [scan_position(text, offset) for offset in offsets]
+    assert positions_from_char_offsets(path, offsets) == expected
+    assert [position_from_char_offset(path, o) for o in offsets] == expected
+
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_byte_offsets(tmp_path: Path, name: str) -> None:
+    path, _, data = write(tmp_path, name)
+    offsets = [-1, *range(len(data) + 2)]
+    expected = [scan_position(data, offset) for offset in offsets]
+    assert positions_from_byte_offsets(path, offsets) == expected
+    assert [position_from_byte_offset(path, o) for o in offsets] == expected
+
+
+def test_byte_offsets_with_char_columns(tmp_path: Path) -> None:
+    path, _, data = write(tmp_path, "multibyte")
+    lines = data.split(b"\n")
+    offsets = list(range(len(data)))
+    for offset, position in zip(
+        offsets, positions_from_byte_offsets(path, offsets, char_columns=True)
+    ):
+        line, byte_column = scan_position(data, offset)
+        column = len(lines[line][:byte_column].decode(errors="ignore"))
+        assert position == (line, column)
+
+
+def test_unordered_offsets_of_large_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # large enough to be mmapped
+    monkeypatch.setattr(file_cache, "MMAP_THRESHOLD", 1024)
+    rng = random.Random(0)
+    text = "".join("x" * rng.randint(0, 80) + "\n" for _ in range(200))
+    path = tmp_path / "large"
+    path.write_text(text)
+    offsets = [rng.randint(-5, len(text) + 5) for _ in range(300)]
+    expected = [scan_position(text, offset) for offset in offsets]
+    assert positions_from_byte_offsets(str(path), offsets) == expected
+    assert positions_from_char_offsets(str(path), offsets) == expected
+    content = file_cache.get_content(str(path))
+    assert content is not None
+    assert isinstance(content.data, mmap.mmap)
+
+
+def test_missing_file(tmp_path: Path) -> None:
+    path = str(tmp_path / "missing")
+    assert positions_from_char_offsets(path, [0, 1]) == [None, None]
+    assert positions_from_byte_offsets(path, [0]) == [None]
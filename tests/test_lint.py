@@ -0,0 +1,92 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+"""Tests for classifying & linting located files"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+from conftest import make_report
+
+import libtkldet.linter
+from libtkldet import modman
+from libtkldet.classifier import FileItem
+from libtkldet.linter import BatchFileLinter, FileLinter
+from libtkldet.report import Report
+
+
+@pytest.fixture
+def events(
+    script: ModuleType, monkeypatch: pytest.MonkeyPatch
+) -> list[object]:
+    """
+    Lint with a linter reporting on every file & a batch linter only
+    accepting "b", recording when the batch linter runs
+    """
+    events: list[object] = []
+
+    class EveryFileLinter(FileLinter):
+        ENABLE_TAGS = set()
+        DISABLE_TAGS = set()
+
+        def check(self, item: FileItem) -> Iterator[Report]:
+            yield make_report(item, "item")
+
+    class OnlyBLinter(BatchFileLinter):
+        ENABLE_TAGS = set()
+        DISABLE_TAGS = set()
+
+        def should_check(self, item: FileItem) -> bool:
+            return Path(item.abspath).name == "b"
+
+        def check_batch(self, items: list[FileItem]) -> Iterator[Report]:
+            events.append("flush")
+            for item in items:
+                yield make_report(item, "batch")
+
+    monkeypatch.setattr(
+        libtkldet.linter, "_LINTERS", [EveryFileLinter, OnlyBLinter]
+    )
+    monkeypatch.setattr(modman, "load_modules_for_tags", lambda tags: False)
+    monkeypatch.setattr(script, "all_classifiers", [], raising=False)
+    script.set_linters()
+    return events
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_batch_reports_keep_locator_order(
+    script: ModuleType, events: list[object], tmp_path: Path, jobs: int
+) -> None:
+    paths = []
+    for name in "abc":
+        (tmp_path / name).write_text("")
+        paths.append(str(tmp_path / name))
+
+    for group in script.lint_paths(
+        [(path, None) for path in paths], str(tmp_path), False, False, jobs
+    ):
+        events.append(
+            [f"{Path(r.item.abspath).name}:{r.message}" for r in group]
+        )
+    # "a" is output before the batch runs, "c" is held back until after it
+    assert events == [
+        ["a:item"],
+        "flush",
+        ["b:item", "b:batch"],
+        ["c:item"],
+    ]
@@ -0,0 +1,88 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for finding appliance files"""
+
+import subprocess
+from os.path import relpath
+from pathlib import Path
+
+from libtkldet.locator import filter_changed, full_appliance_locator
+
+
+def make_appliance(tmp_path: Path) -> Path:
+    root = tmp_path / "app"
+    (root / "conf.d").mkdir(parents=True)
+    (root / "Makefile").write_text("")
+    (root / "conf.d" / "main").write_text("#!/bin/sh\n")
+    return root
+
+
+def git(root: Path, *args: str) -> None:
+    subprocess.run(
+        [
+            "git",
+            "-C",
+            str(root),
+            "-c",
+            "user.name=test",
+            "-c",
+            "user.email=test@example.com",
+            *args,
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_overlay_is_walked(tmp_path: Path) -> None:
+    root = make_appliance(tmp_path)
+    (root / "overlay" / "etc").mkdir(parents=True)
+    (root / "overlay" / "etc" / "a.conf").write_text("")
+    (root / "overlay" / ".hidden").write_text("")
+    paths = list(full_appliance_locator(str(root)))
+    assert paths[-3:] == [
+        f"{root}/overlay/",
+        f"{root}/overlay/etc",
+        f"{root}/overlay/etc/a.conf",
+    ]
+
+
+def test_missing_overlay_yields_nothing(tmp_path: Path) -> None:
+    root = make_appliance(tmp_path)
+    paths = [
+        relpath(path, root) for path in full_appliance_locator(str(root))
+    ]
+    assert not any(path.startswith("overlay") for path in paths)
+    assert "conf.d/main" in paths
+
+
+def test_filter_changed_with_file_root(tmp_path: Path) -> None:
+    git(tmp_path, "init", "-q")
+    changed = tmp_path / "changed.py"
+    unchanged = tmp_path / "unchanged.py"
+    changed.write_text("a = 1\n")
+    unchanged.write_text("b = 1\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "initial")
+    changed.write_text("a = 2\n")
+
+    # a single file, as linted with --ignore-non-appliance
+    assert list(filter_changed([str(changed)], str(changed), "HEAD")) == [
+        str(changed)
+    ]
+    assert not list(filter_changed([str(unchanged)], str(unchanged), "HEAD"))
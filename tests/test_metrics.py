@@ -0,0 +1,53 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+"""Tests for per component metrics"""
+
+from collections.abc import Iterator
+
+import pytest
+
+from libtkldet import metrics
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(metrics, "_ENABLED", True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def linter_metrics(name: str) -> dict:
+    (found,) = [
+        data for data in metrics.snapshot()["linters"] if data["name"] == name
+    ]
+    return found
+
+
+def test_unattributed_peak_memory_is_none() -> None:
+    metrics.count("linter", "a", checked=1)
+    assert linter_metrics("a")["child_max_rss_kb"] is None
+
+
+def test_merge_keeps_known_peak_memory() -> None:
+    metrics.count("linter", "a", checked=1)
+    metrics.merge(
+        {"linters": [{**linter_metrics("a"), "child_max_rss_kb": 100}]}
+    )
+    metrics.merge({"linters": [linter_metrics("a")]})
+    assert linter_metrics("a")["child_max_rss_kb"] == 100
+    assert linter_metrics("a")["checked"] == 4
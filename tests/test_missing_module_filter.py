@@ -0,0 +1,60 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+"""Tests for annotating pylint import errors with packages"""
+
+from collections.abc import Iterable
+from pathlib import Path
+
+import pytest
+from conftest import make_item, make_report
+
+from libtkldet.report import FileReport
+from tkldet_modules import missing_module_filter
+from tkldet_modules.missing_module_filter import MissingModuleFilter
+
+
+def import_error(tmp_path: Path, module: str) -> FileReport:
+    message = f"Unable to import '{module}'"
+    return make_report(
+        make_item(tmp_path, "a.py"),
+        message,
+        "pylint",
+        {"symbol": "import-error", "message": message},
+    )
+
+
+def test_modules_are_looked_up_once_per_run(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    lookups: list[set[str]] = []
+
+    def find(modules: Iterable[str]) -> dict[str, list[str]]:
+        lookups.append(set(modules))
+        return {module: [] for module in modules}
+
+    monkeypatch.setattr(
+        missing_module_filter, "find_python_packages_from_imports", find
+    )
+    filt = MissingModuleFilter()
+    filt.filter_batch(
+        [import_error(tmp_path, "foo"), import_error(tmp_path, "bar")]
+    )
+    filt.filter_batch([import_error(tmp_path, "foo")])
+    filt.filter_batch(
+        [import_error(tmp_path, "foo"), import_error(tmp_path, "baz")]
+    )
+    assert lookups == [{"foo", "bar"}, {"baz"}]
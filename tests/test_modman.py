@@ -0,0 +1,105 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+"""Tests for lazily loading modules"""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from libtkldet import colors, modman
+from libtkldet.classifier import _CLASSIFIERS
+from libtkldet.linter import _LINTERS
+from libtkldet.report import _FILTERS
+
+MODULES = {
+    "classify.py": """
+from libtkldet.classifier import FileClassifier, register_classifier
+
+@register_classifier
+class LazyTestClassifier(FileClassifier):
+    def classify(self, item):
+        pass
+""",
+    "lint.py": """
+from libtkldet.linter import FileLinter, register_linter
+
+@register_linter
+class LazyTestLinter(FileLinter):
+    ENABLE_TAGS = {"ext:lazy"}
+    DISABLE_TAGS = set()
+""",
+    "filt.py": """
+from libtkldet.report import ReportFilter, register_filter
+
+@register_filter
+class LazyTestFilter(ReportFilter):
+    pass
+""",
+}
+
+
+@pytest.fixture
+def modules_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[Path]:
+    colors.set_colors_enabled(False)
+    root = tmp_path / "tkldet_modules"
+    root.mkdir()
+    for name, source in MODULES.items():
+        (root / name).write_text(source)
+    monkeypatch.setattr(modman, "MOD_PATH", [str(tmp_path)])
+    monkeypatch.setattr(modman, "CACHE_DIR", str(tmp_path / "cache"))
+    saved = [list(x) for x in (_CLASSIFIERS, _LINTERS, _FILTERS)]
+    saved_modules = list(modman._MODULES)
+    yield root
+    for registered, before in zip((_CLASSIFIERS, _LINTERS, _FILTERS), saved):
+        registered[:] = before
+    modman._MODULES[:] = saved_modules
+
+
+def registered() -> set[str]:
+    return {x.__name__ for x in (*_CLASSIFIERS, *_LINTERS, *_FILTERS)}
+
+
+def test_modules_are_loaded_when_needed(modules_dir: Path) -> None:
+    # first run loads everything to generate the manifest
+    modman.load_modules()
+    assert (modules_dir / modman.MANIFEST_NAME).exists()
+    assert {"LazyTestClassifier", "LazyTestLinter", "LazyTestFilter"} <= (
+        registered()
+    )
+
+    # later runs only load modules providing classifiers up front
+    for registry in (_CLASSIFIERS, _LINTERS, _FILTERS):
+        registry[:] = [
+            x for x in registry if not x.__name__.startswith("LazyTest")
+        ]
+    modman.load_modules()
+    assert "LazyTestClassifier" in registered()
+    assert "LazyTestLinter" not in registered()
+    assert "LazyTestFilter" not in registered()
+
+    assert not modman.load_modules_for_tags({"ext:other"})
+    assert modman.load_modules_for_tags({"ext:lazy", "ext:other"})
+    assert "LazyTestLinter" in registered()
+    assert not modman.load_modules_for_tags({"ext:lazy"})
+
+    assert "LazyTestFilter" not in registered()
+    assert modman.load_filter_modules()
+    assert "LazyTestFilter" in registered()
+    assert not modman.load_filter_modules()
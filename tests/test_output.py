@@ -0,0 +1,135 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for the jsonl & sarif report writers"""
+
+import io
+import json
+from pathlib import Path
+
+from conftest import make_item, make_report
+
+from libtkldet.output import JsonLinesWriter, SarifWriter, sort_by_line
+from libtkldet.report import Report
+
+TEXT = "a = 1\nb = 2\n"
+
+
+def write_sarif(reports: list[Report]) -> dict:
+    fob = io.StringIO()
+    writer = SarifWriter(fob)
+    writer.begin()
+    writer.write_group(reports)
+    writer.end()
+    return json.loads(fob.getvalue())
+
+
+def test_sarif_rule_ids(tmp_path: Path) -> None:
+    item = make_item(tmp_path, "a.py", TEXT)
+    log = write_sarif(
+        [
+            make_report(item, source="ruff", raw={"code": "F401"}),
+            make_report(item, source="pylint", raw={"symbol": "import-error"}),
+            make_report(item, source="shellcheck", raw={"code": 2086}),
+            make_report(item, source="ruff", raw={"code": "F401"}),
+            make_report(item, source="custom"),
+        ]
+    )
+    run = log["runs"][0]
+    assert [result["ruleId"] for result in run["results"]] == [
+        "ruff/F401",
+        "pylint/import-error",
+        "shellcheck/2086",
+        "ruff/F401",
+        "custom",
+    ]
+    assert run["tool"]["driver"]["rules"] == [
+        {"id": "custom"},
+        {"id": "pylint/import-error"},
+        {"id": "ruff/F401"},
+        {"id": "shellcheck/2086"},
+    ]
+
+
+def test_sarif_regions(tmp_path: Path) -> None:
+    item = make_item(tmp_path, "a.py", TEXT)
+    log = write_sarif(
+        [
+            make_report(item, source="a", line=2, column=3),
+            make_report(item, source="b", line=(1, 2), column=(2, 4)),
+            make_report(item, source="c", line=None),
+        ]
+    )
+    locations = [
+        result["locations"][0]["physicalLocation"]
+        for result in log["runs"][0]["results"]
+    ]
+    assert (
+        locations[0]["artifactLocation"]["uri"] == Path(item.abspath).as_uri()
+    )
+    assert locations[0]["region"] == {"startLine": 2, "startColumn": 4}
+    assert locations[1]["region"] == {
+        "startLine": 1,
+        "endLine": 2,
+        "startColumn": 2,
+        "endColumn": 5,
+    }
+    assert "region" not in locations[2]
+
+
+def test_jsonl_writes_a_line_per_report(tmp_path: Path) -> None:
+    item = make_item(tmp_path, "a.py", TEXT)
+    fob = io.StringIO()
+    writer = JsonLinesWriter(fob)
+    writer.begin()
+    writer.write_group(
+        [
+            make_report(
+                item, source="ruff", raw={"code": "F401"}, line=(1, 2)
+            ),
+            make_report(item, source="custom", line=2, column=1),
+        ]
+    )
+    writer.end()
+    records = [json.loads(line) for line in fob.getvalue().splitlines()]
+    assert len(records) == 2
+    assert records[0]["item"] == {
+        "type": "FileItem",
+        "value": item.value,
+        "relpath": item.relpath,
+        "abspath": item.abspath,
+    }
+    assert records[0]["line"] == [1, 2]
+    assert records[0]["raw"] == {"code": "F401"}
+    assert (records[1]["source"], records[1]["line"]) == ("custom", 2)
+    assert records[1]["level"] == "WARN"
+
+
+def test_sort_by_line(tmp_path: Path) -> None:
+    item = make_item(tmp_path, "a.py", TEXT)
+    reports = [
+        make_report(item, source="a", line=3),
+        make_report(item, source="b", line=(1, 4)),
+        make_report(item, source="c", line=None),
+        make_report(item, source="d", line=1),
+    ]
+    assert [report.source for report in sort_by_line(reports)] == [
+        "c",
+        "b",
+        "d",
+        "a",
+    ]
@@ -0,0 +1,72 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+"""Tests for the pylint linter module"""
+
+from os.path import abspath, dirname, join
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pylint")
+
+from astroid import MANAGER
+from astroid.interpreter._import.spec import _SPEC_FINDERS, _find_spec
+from pylint.lint import Run
+from pylint.reporters import CollectingReporter
+
+from tkldet_modules import pylint as pylint_module
+
+RCFILE = join(dirname(dirname(abspath(__file__))), "pylint_rcfile")
+
+
+@pytest.fixture
+def in_process(
+    monkeypatch: pytest.MonkeyPatch,
+) -> pylint_module.InProcessPylint:
+    # only imported by the module when pylint is actually used
+    for name, value in (
+        ("MANAGER", MANAGER),
+        ("_SPEC_FINDERS", _SPEC_FINDERS),
+        ("_find_spec", _find_spec),
+        ("Run", Run),
+        ("CollectingReporter", CollectingReporter),
+    ):
+        monkeypatch.setattr(pylint_module, name, value, raising=False)
+    return pylint_module.InProcessPylint(RCFILE)
+
+
+def symbols(output: list[dict]) -> set[str]:
+    return {report["symbol"] for report in output}
+
+
+def test_results_do_not_depend_on_other_files(
+    in_process: pylint_module.InProcessPylint, tmp_path: Path
+) -> None:
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "tkldet_helper.py").write_text('"""helper"""\n')
+    for path in (tmp_path / "a" / "y.py", tmp_path / "b" / "z.py"):
+        path.write_text('"""module"""\nimport tkldet_helper\n')
+
+    z_output = in_process.check(str(tmp_path / "b" / "z.py"))
+    assert "import-error" not in symbols(z_output)
+
+    y_output = in_process.check(str(tmp_path / "a" / "y.py"))
+    assert "import-error" in symbols(y_output)
+
+    z_output = in_process.check(str(tmp_path / "b" / "z.py"))
+    assert "import-error" not in symbols(z_output)
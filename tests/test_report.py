@@ -0,0 +1,197 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for routing reports through filters"""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from conftest import make_item, make_report
+
+from libtkldet import report as report_module
+from libtkldet.error import FilterError
+from libtkldet.report import (
+    Report,
+    ReportFilter,
+    filter_all_reports,
+    filter_report_groups,
+    report_symbol,
+)
+
+
+class UpperFilter(ReportFilter):
+    def filter(self, report: Report) -> Iterator[Report]:
+        yield report.modified(message=report.message.upper())
+
+
+@pytest.fixture
+def filters(monkeypatch: pytest.MonkeyPatch) -> list[type[ReportFilter]]:
+    registered: list[type[ReportFilter]] = []
+    monkeypatch.setattr(report_module, "_FILTERS", registered)
+    return registered
+
+
+def test_groups_are_filtered_as_they_arrive(
+    tmp_path: Path, filters: list[type[ReportFilter]]
+) -> None:
+    filters.append(UpperFilter)
+    first = make_item(tmp_path, "a.sh")
+
+    def groups() -> Iterator[list[Report]]:
+        yield [make_report(first, "a")]
+        pytest.fail("second group requested before first was consumed")
+
+    filtered = filter_report_groups(groups())
+    assert [report.message for report in next(filtered)] == ["A"]
+
+
+def test_empty_groups_are_skipped(
+    tmp_path: Path, filters: list[type[ReportFilter]]
+) -> None:
+    class DropFilter(ReportFilter):
+        def filter(self, report: Report) -> Iterator[Report]:
+            if report.message != "drop":
+                yield report
+
+    filters.append(DropFilter)
+    first = make_item(tmp_path, "a.sh")
+    second = make_item(tmp_path, "b.sh")
+    filtered = list(
+        filter_report_groups(
+            [[make_report(first, "drop")], [make_report(second, "keep")]]
+        )
+    )
+    assert [[report.message for report in group] for group in filtered] == [
+        ["keep"]
+    ]
+
+
+def test_report_symbol(tmp_path: Path) -> None:
+    item = make_item(tmp_path, "a.py")
+    assert report_symbol(
+        make_report(item, "a", raw={"symbol": "import-error"})
+    ) == ("import-error")
+    ruff = make_report(item, "a").modified(raw={"code": "F401"})
+    assert report_symbol(ruff) == "F401"
+    shellcheck = make_report(item, "a").modified(raw={"code": 2086})
+    assert report_symbol(shellcheck) == "2086"
+    assert report_symbol(make_report(item, "a").modified(raw=None)) is None
+
+
+def test_reports_are_routed_by_source_and_symbol(
+    tmp_path: Path, filters: list[type[ReportFilter]]
+) -> None:
+    seen: list[str] = []
+
+    class ImportErrorFilter(ReportFilter):
+        SOURCES = {"pylint"}
+        SYMBOLS = {"import-error"}
+
+        def filter(self, report: Report) -> Iterator[Report]:
+            seen.append(report.message)
+            yield report.modified(message=report.message.upper())
+
+    filters.append(ImportErrorFilter)
+    item = make_item(tmp_path, "a.py")
+    reports = [
+        make_report(item, "a", "pylint", {"symbol": "import-error"}),
+        make_report(item, "b", "pylint", {"symbol": "unused-import"}),
+        make_report(item, "c", "ruff", {"symbol": "import-error"}),
+        make_report(item, "d", "pylint", {"symbol": "import-error"}),
+    ]
+    filtered = list(filter_all_reports(reports))
+    assert seen == ["a", "d"]
+    assert [report.message for report in filtered] == ["A", "b", "c", "D"]
+
+
+def test_handles_is_cached_per_source_and_symbol(
+    tmp_path: Path, filters: list[type[ReportFilter]]
+) -> None:
+    asked: list[tuple[str, str | None]] = []
+
+    class CountingFilter(UpperFilter):
+        def handles(self, source: str, symbol: str | None) -> bool:
+            asked.append((source, symbol))
+            return source == "pylint"
+
+    filters.append(CountingFilter)
+    item = make_item(tmp_path, "a.py")
+    groups = [
+        [make_report(item, "a", "pylint"), make_report(item, "b", "ruff")],
+        [make_report(item, "c", "pylint"), make_report(item, "d", "ruff")],
+    ]
+    filtered = list(filter_report_groups(groups))
+    assert asked == [("pylint", None), ("ruff", None)]
+    assert [[report.message for report in group] for group in filtered] == [
+        ["A", "b"],
+        ["C", "d"],
+    ]
+
+
+def test_batches_keep_report_order(
+    tmp_path: Path, filters: list[type[ReportFilter]]
+) -> None:
+    batches: list[list[str]] = []
+
+    class SplitFilter(ReportFilter):
+        WEIGHT = 10
+        SYMBOLS = {"split"}
+
+        def filter_batch(self, reports: list[Report]) -> list[list[Report]]:
+            batches.append([report.message for report in reports])
+            return [
+                [
+                    report.modified(message=f"{report.message}1"),
+                    report.modified(message=f"{report.message}2"),
+                ]
+                if report.message != "drop"
+                else []
+                for report in reports
+            ]
+
+    filters.extend([UpperFilter, SplitFilter])
+    item = make_item(tmp_path, "a.py")
+    reports = [
+        make_report(item, "a", raw={"symbol": "split"}),
+        make_report(item, "b"),
+        make_report(item, "drop", raw={"symbol": "split"}),
+        make_report(item, "c", raw={"symbol": "split"}),
+    ]
+    (filtered,) = filter_report_groups([reports])
+    # SplitFilter is lighter, so runs first & UpperFilter sees its output
+    assert batches == [["a", "drop", "c"]]
+    assert [report.message for report in filtered] == [
+        "A1",
+        "A2",
+        "B",
+        "C1",
+        "C2",
+    ]
+
+
+def test_filter_batch_length_mismatch(
+    tmp_path: Path, filters: list[type[ReportFilter]]
+) -> None:
+    class BrokenFilter(ReportFilter):
+        def filter_batch(self, reports: list[Report]) -> list[list[Report]]:
+            return []
+
+    filters.append(BrokenFilter)
+    item = make_item(tmp_path, "a.py")
+    with pytest.raises(FilterError):
+        list(filter_all_reports([make_report(item, "a")]))
@@ -0,0 +1,69 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for the ruff linter module"""
+
+from pathlib import Path
+
+import pytest
+from conftest import make_item
+
+from tkldet_modules import ruff as ruff_module
+from tkldet_modules.ruff import ruff_config_key
+
+
+def test_config_key_changes_with_config(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    path = str(project / "src" / "a.py")
+    before = ruff_config_key(path)
+
+    (project / "ruff.toml").write_text("line-length = 79\n")
+    with_config = ruff_config_key(path)
+    assert with_config != before
+
+    (project / "ruff.toml").write_text("line-length = 100\n")
+    assert ruff_config_key(path) != with_config
+
+
+def test_config_key_ignores_unrelated_config(tmp_path: Path) -> None:
+    (tmp_path / "project").mkdir()
+    (tmp_path / "other").mkdir()
+    path = str(tmp_path / "project" / "a.py")
+    before = ruff_config_key(path)
+    (tmp_path / "other" / "pyproject.toml").write_text("[tool.ruff]\n")
+    assert ruff_config_key(path) == before
+
+
+@pytest.mark.skipif(
+    not hasattr(ruff_module, "RuffLinter"), reason="ruff isn't installed"
+)
+def test_batch_reports_belong_to_their_file(tmp_path: Path) -> None:
+    items = [
+        make_item(tmp_path, "a.py", "import os\n"),
+        make_item(tmp_path, "b.py", "import sys\n"),
+        make_item(tmp_path, "c.py", "import json\n"),
+    ]
+    unused: dict[str, list[str]] = {}
+    for report in ruff_module.RuffLinter().check_batch(items):
+        if report.raw is not None and report.raw["code"] == "F401":
+            name = Path(report.item.abspath).name
+            unused.setdefault(name, []).append(report.raw["message"])
+    assert sorted(unused) == ["a.py", "b.py", "c.py"]
+    for name, module in (("a.py", "os"), ("b.py", "sys"), ("c.py", "json")):
+        (message,) = unused[name]
+        assert f"`{module}`" in message
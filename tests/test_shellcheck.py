@@ -0,0 +1,85 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+"""Tests for the shellcheck linter module"""
+
+from pathlib import Path
+
+import pytest
+from conftest import make_item
+
+from tkldet_modules import shellcheck as shellcheck_module
+from tkldet_modules.shellcheck import shellcheck_config_key
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
+    return home
+
+
+def test_config_key_changes_with_rcfile(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    (project / "conf.d").mkdir(parents=True)
+    path = str(project / "conf.d" / "main")
+    before = shellcheck_config_key(path)
+
+    (project / ".shellcheckrc").write_text("disable=SC2086\n")
+    with_rcfile = shellcheck_config_key(path)
+    assert with_rcfile != before
+
+    (project / ".shellcheckrc").write_text("disable=SC2086,SC2154\n")
+    assert shellcheck_config_key(path) != with_rcfile
+
+
+def test_config_key_changes_with_user_rcfile(
+    tmp_path: Path, home: Path
+) -> None:
+    (tmp_path / "project").mkdir()
+    path = str(tmp_path / "project" / "main")
+    before = shellcheck_config_key(path)
+    (home / ".shellcheckrc").write_text("disable=SC2086\n")
+    assert shellcheck_config_key(path) != before
+
+
+def test_config_key_ignores_unrelated_rcfile(tmp_path: Path) -> None:
+    (tmp_path / "project").mkdir()
+    (tmp_path / "other").mkdir()
+    path = str(tmp_path / "project" / "main")
+    before = shellcheck_config_key(path)
+    (tmp_path / "other" / ".shellcheckrc").write_text("disable=SC2086\n")
+    assert shellcheck_config_key(path) == before
+
+
+@pytest.mark.skipif(
+    not hasattr(shellcheck_module, "Shellcheck"),
+    reason="shellcheck isn't installed",
+)
+def test_batch_reports_belong_to_their_file(tmp_path: Path) -> None:
+    items = [
+        make_item(tmp_path, "a", "#!/bin/sh\necho $1\n"),
+        make_item(tmp_path, "b", '#!/bin/sh\necho "$1"\n'),
+        make_item(tmp_path, "c", '#!/bin/sh\necho "$foo"\n'),
+    ]
+    codes: dict[str, set[int]] = {}
+    for report in shellcheck_module.Shellcheck().check_batch(items):
+        assert report.raw is not None
+        name = Path(report.item.abspath).name
+        codes.setdefault(name, set()).add(report.raw["code"])
+    assert codes == {"a": {2086}, "c": {2154}}
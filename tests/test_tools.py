@@ -0,0 +1,94 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for external tool detection"""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from libtkldet import tools
+
+STATUS = """\
+Package: shellcheck
+Status: install ok installed
+Version: 0.9.0-1
+
+Package: removed-tool
+Status: deinstall ok config-files
+Version: 1.0
+
+Package: ruff
+Status: install ok installed
+Priority: optional
+Version: 0.4.4-1
+Description: a python linter
+ with a continuation line
+ Version: not a field
+"""
+
+
+@pytest.fixture
+def dpkg_status(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[Path]:
+    path = tmp_path / "status"
+    path.write_text(STATUS)
+    monkeypatch.setattr(tools, "DPKG_STATUS", str(path))
+    tools.installed_packages.cache_clear()
+    tools.find_executable.cache_clear()
+    yield path
+    tools.installed_packages.cache_clear()
+    tools.find_executable.cache_clear()
+
+
+def test_installed_packages(dpkg_status: Path) -> None:
+    assert tools.installed_packages() == {
+        "shellcheck": "0.9.0-1",
+        "ruff": "0.4.4-1",
+    }
+    assert tools.is_installed("ruff")
+    assert not tools.is_installed("removed-tool")
+
+
+def test_missing_status_file(
+    dpkg_status: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(tools, "DPKG_STATUS", str(dpkg_status) + ".missing")
+    assert tools.installed_packages() == {}
+
+
+def test_installed_package_without_executable_is_unavailable(
+    dpkg_status: Path, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    tool = tools.Tool("shellcheck", "shellcheck")
+    assert tools.is_installed("shellcheck")
+    assert not tool.is_available()
+
+
+def test_executable_in_path_is_available(
+    dpkg_status: Path, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    executable = tmp_path / "some-tool"
+    executable.write_text("#!/bin/sh\n")
+    executable.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    tool = tools.Tool("some-tool")
+    assert tool.path == str(executable)
+    assert tool.is_available()
@@ -0,0 +1,112 @@
+# Copyright (c) Turnkey GNU/Linux <admin@turnkeylinux.org>
+#
+# this file is part of tkldev-detective.
+#
+# tkldev-detective is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# tkldev-detective is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for watch mode surviving errors"""
+
+import io
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+from libtkldet import colors, output
+from libtkldet.report import Report
+
+
+def make_appliance(tmp_path: Path, plan: str) -> Path:
+    root = tmp_path / "app"
+    (root / "plan").mkdir(parents=True)
+    (root / "conf.d").mkdir()
+    (root / "Makefile").write_text(
+        "COMMON_OVERLAYS =\n"
+        "COMMON_CONF =\n"
+        "COMMON_REMOVELISTS =\n"
+        "COMMON_REMOVELISTS_FINAL =\n"
+    )
+    (root / "plan" / "main").write_text(plan)
+    (root / "conf.d" / "main").write_text("#!/bin/sh\n")
+    return root
+
+
+def test_watch_survives_bad_plan(
+    script: ModuleType,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    colors.set_colors_enabled(False)
+    root = make_appliance(tmp_path, "#include <no/such/plan>\n")
+    linted: list[list[str]] = []
+
+    def lint_paths(
+        entries: Iterable[tuple[str, object]], *args: object
+    ) -> Iterator[list[Report]]:
+        linted.append([path for path, _ in entries])
+        yield from ()
+
+    monkeypatch.setattr(script, "lint_paths", lint_paths)
+    plan = str(root / "plan" / "main")
+    confd = str(root / "conf.d" / "main")
+
+    def changes() -> Iterator[set[str]]:
+        # still broken, nothing is linted
+        yield {confd}
+        # fixed, common data is re-initialized & linting resumes
+        (root / "plan" / "main").write_text("some-package\n")
+        yield {plan}
+        yield {confd}
+
+    script.lint_changes(
+        str(root), changes(), output.TextWriter(io.StringIO()), 1, None
+    )
+    errors = capsys.readouterr().err
+    assert errors.count("unable to find required plan: no/such/plan") == 2
+    assert linted == [[plan], [confd]]
+
+
+def test_watch_survives_lint_error(
+    script: ModuleType,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    colors.set_colors_enabled(False)
+    root = make_appliance(tmp_path, "some-package\n")
+    linted: list[list[str]] = []
+
+    def lint_paths(
+        entries: Iterable[tuple[str, object]], *args: object
+    ) -> Iterator[list[Report]]:
+        paths = [path for path, _ in entries]
+        linted.append(paths)
+        if len(linted) == 1:
+            raise KeyError("FAB_PATH")
+        yield from ()
+
+    monkeypatch.setattr(script, "lint_paths", lint_paths)
+    confd = str(root / "conf.d" / "main")
+    script.lint_changes(
+        str(root),
+        [{confd}, {confd}],
+        output.TextWriter(io.StringIO()),
+        1,
+        None,
+    )
+    assert "failed to lint changed files" in caplog.text
+    assert "KeyError: 'FAB_PATH'" in caplog.text
+    assert linted == [[confd], [confd]]
@@ -17,7 +17,6 @@
 
 """Lints for appliance conf.d/* scripts"""
 
-import os
 import stat
 from collections.abc import Generator
 from typing import ClassVar
@@ -32,7 +31,9 @@ class ApplianceConfDLinter(FileLinter):
     DISABLE_TAGS: ClassVar[set[str]] = set()
 
     def check(self, item: FileItem) -> Generator[Report, None, None]:
-        mode = os.lstat(item.abspath).st_mode
+        if item.stat is None:
+            return
+        mode = item.stat.mode
         if not (
             (mode & stat.S_IXUSR)
             or (mode & stat.S_IXGRP)
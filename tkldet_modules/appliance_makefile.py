@@ -17,13 +17,37 @@
 
 """Linters for appliance makefile"""
 
+import os
 from collections.abc import Generator
+from functools import lru_cache
 from typing import ClassVar
 
 from libtkldet.fuzzy import fuzzy_suggest
 from libtkldet.linter import FileItem, FileLinter, register_linter
 from libtkldet.report import FileReport, Report, ReportLevel
 
+TURNKEY_MK = "/turnkey/fab/common/mk/turnkey.mk"
+
+
+@lru_cache(maxsize=1)
+def _read_mk_confvars(mtime_ns: int) -> tuple[str, ...]:
+    mk_confvars = ["COMMON_CONF", "COMMON_OVERLAYS"]
+    with open(TURNKEY_MK, "r") as fob:
+        for line in fob:
+            if line.startswith("CONF_VARS += "):
+                mk_confvars.extend(line.strip().split()[2:])
+    return tuple(mk_confvars)
+
+
+def get_mk_confvars() -> list[str]:
+    """
+    Return variables appliance makefiles may set
+
+    turnkey.mk is only re-read if it changes, as it's shared by every
+    appliance
+    """
+    return list(_read_mk_confvars(os.stat(TURNKEY_MK).st_mtime_ns))
+
 
 @register_linter
 class ApplianceMakefileLinter(FileLinter):
@@ -33,68 +57,65 @@ class ApplianceMakefileLinter(FileLinter):
     DISABLE_TAGS: ClassVar[set[str]] = set()
 
     def check(self, item: FileItem) -> Generator[Report, None, None]:
-        mk_confvars = ["COMMON_CONF", "COMMON_OVERLAYS"]
-        with open("/turnkey/fab/common/mk/turnkey.mk", "r") as fob:
-            for line in fob:
-                if line.startswith("CONF_VARS += "):
-                    mk_confvars.extend(line.strip().split()[2:])
+        mk_confvars = get_mk_confvars()
 
         in_define = False
         first_include = None
 
-        with open(item.abspath, "r") as fob:
-            for i, line in enumerate(fob):
-                if in_define:
-                    # ignore matches inside define, might cause false
-                    # positives
-                    if line.startswith("endef"):
-                        in_define = False
-                    continue
-                elif line.startswith("define"):
-                    # ignore matches inside define, might cause false
-                    # positives
-                    in_define = True
-                    continue
-                elif line.startswith("include"):
-                    first_include = i
-                    continue
-                elif "=" in line:
-                    if "+=" in line:
-                        var = line.split("+=", 1)[0].strip()
+        content = item.content
+        lines = content.lines if content is not None else []
+        for i, line in enumerate(lines):
+            if in_define:
+                # ignore matches inside define, might cause false
+                # positives
+                if line.startswith("endef"):
+                    in_define = False
+                continue
+            elif line.startswith("define"):
+                # ignore matches inside define, might cause false
+                # positives
+                in_define = True
+                continue
+            elif line.startswith("include"):
+                first_include = i
+                continue
+            elif "=" in line:
+                if "+=" in line:
+                    var = line.split("+=", 1)[0].strip()
+                else:
+                    var = line.split("=", 1)[0].strip()
+                if var not in mk_confvars:
+                    suggested_var = fuzzy_suggest(var, mk_confvars)
+                    if suggested_var:
+                        fix = (
+                            f"did you mean {suggested_var!r}"
+                            f" instead of {var!r} ?"
+                        )
                     else:
-                        var = line.split("=", 1)[0].strip()
-                    if var not in mk_confvars:
-                        suggested_var = fuzzy_suggest(var, mk_confvars)
-                        if suggested_var:
-                            fix = (
-                                f"did you mean {suggested_var!r}"
-                                f" instead of {var!r} ?"
-                            )
-                        else:
-                            fix = (
-                                f"either replace with one of {mk_confvars}"
-                                " or add it to turnkey.mk's list of valid"
-                                " CONF_VARS"
-                            )
-                        yield FileReport(
-                            item=item,
-                            line=i + 1,
-                            column=(1, len(var)),
-                            location_metadata=None,
-                            fix=fix,
-                            message="variable set is not a known CONF_VAR",
-                            source="appliance-makefile-linter",
-                            level=ReportLevel.WARN,
+                        fix = (
+                            f"either replace with one of {mk_confvars}"
+                            " or add it to turnkey.mk's list of valid"
+                            " CONF_VARS"
                         )
+                    yield FileReport(
+                        item=item,
+                        line=i + 1,
+                        column=(1, len(var)),
+                        location_metadata=None,
+                        fix=fix,
+                        message="variable set is not a known CONF_VAR",
+                        source="appliance-makefile-linter",
+                        level=ReportLevel.WARN,
+                    )
 
-                    if first_include:
-                        yield FileReport(
-                            item=item,
-                            line=i + 1,
-                            column=line.find("="),
-                            location_metadata=None,
-                            message="variable defined AFTER includes",
-                            fix="move variable definitions to top of Makefile",
-                            source="appliance-makefile-linter",
-                            level=ReportLevel.WARN,
-                        )
+                if first_include:
+                    yield FileReport(
+                        item=item,
+                        line=i + 1,
+                        column=line.find("="),
+                        location_metadata=None,
+                        message="variable defined AFTER includes",
+                        fix="move variable definitions to top of Makefile",
+                        source="appliance-makefile-linter",
+                        level=ReportLevel.WARN,
+                    )
@@ -17,7 +17,7 @@
 """General file classification"""
 
 from logging import getLogger
-from os.path import isfile, splitext
+from os.path import splitext
 from typing import ClassVar
 
 from libtkldet.classifier import FileClassifier, FileItem, register_classifier
@@ -32,7 +32,7 @@ class FiletypeClassifier(FileClassifier):
     WEIGHT: ClassVar[int] = 10
 
     def classify(self, item: FileItem) -> None:
-        if isfile(item.abspath) and "." in item.value:
+        if item.stat is not None and item.stat.is_file and "." in item.value:
             item.add_tags(self, [f"ext:{splitext(item.value)[1][1:]}"])
 
 
@@ -43,17 +43,16 @@ class ShebangClassifier(FileClassifier):
     WEIGHT: ClassVar[int] = 10
 
     def classify(self, item: FileItem) -> None:
-        if isfile(item.abspath):
+        if item.stat is not None and item.stat.is_file:
             other_parts = []
-            with open(item.abspath, "rb") as fob:
-                shebang = b""
-                head = fob.read(512)
+            shebang = b""
+            head = item.head(512) or b""
 
-                if b"\n" in head:
-                    shebang = head.split(b"\n")[0].strip()
-                    if shebang:
-                        other_parts = shebang.split()
-                        shebang = other_parts.pop(0)
+            if b"\n" in head:
+                shebang = head.split(b"\n")[0].strip()
+                if shebang:
+                    other_parts = shebang.split()
+                    shebang = other_parts.pop(0)
 
             try:
                 other_parts = [part.decode() for part in other_parts]
@@ -35,17 +35,19 @@ class JsonLinter(FileLinter):
     DISABLE_TAGS: ClassVar[set[str]] = set()
 
     def check(self, item: FileItem) -> Generator[Report, None, None]:
-        with open(item.abspath, "r") as fob:
-            try:
-                json.load(fob)
-            except json.decoder.JSONDecodeError as e:
-                yield FileReport(
-                    item=item,
-                    line=e.lineno,
-                    column=e.colno - 1,
-                    location_metadata=None,
-                    message=e.msg,
-                    fix=None,
-                    source="json_check",
-                    level=ReportLevel.ERROR,
-                )
+        content = item.content
+        if content is None:
+            return
+        try:
+            json.loads(content.text)
+        except json.decoder.JSONDecodeError as e:
+            yield FileReport(
+                item=item,
+                line=e.lineno,
+                column=e.colno - 1,
+                location_metadata=None,
+                message=e.msg,
+                fix=None,
+                source="json_check",
+                level=ReportLevel.ERROR,
+            )
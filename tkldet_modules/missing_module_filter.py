@@ -16,10 +16,11 @@
 # tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
 
 import re
-from collections.abc import Generator
+from collections.abc import Iterator
 from os.path import dirname
+from typing import ClassVar
 
-from libtkldet.apt_file import find_python_package_from_import
+from libtkldet.apt_file import find_python_packages_from_imports
 from libtkldet.common_data import (
     get_path_in_common_overlay,
     is_package_to_be_installed,
@@ -30,9 +31,20 @@ from libtkldet.report import Report, ReportFilter, ReportLevel, register_filter
 MISSING_MODULE_RE = re.compile(r"^Unable to import '(.*)'$")
 
 
-def filter_packaged(report: Report, module_name: str) -> Report | None:
-    packages = find_python_package_from_import(module_name)
+def missing_module_name(report: Report) -> str | None:
+    """Return name of module pylint couldn't import, if report is for one"""
+    if (
+        report.source == "pylint"
+        and report.raw is not None
+        and report.raw["symbol"] == "import-error"
+    ):
+        match = MISSING_MODULE_RE.match(report.raw["message"])
+        assert match is not None
+        return match.group(1)
+    return None
 
+
+def filter_packaged(report: Report, packages: list[str]) -> Report | None:
     modified_fix = report.fix or ""
     modified_message = report.message
     modified_level = report.level
@@ -72,36 +84,57 @@ def filter_packaged(report: Report, module_name: str) -> Report | None:
     )
 
 
+def filter_missing_module(
+    report: Report, packages: dict[str, list[str]]
+) -> Iterator[Report]:
+    """Filter a single report, given packages providing missing modules"""
+    module_name = missing_module_name(report)
+    if module_name is None:
+        yield report
+        return
+    if (
+        isinstance(report.item, FileItem)
+        and dirname(report.item.relpath) == "overlay/usr/lib/inithooks/bin"
+    ):
+        temp_module_name = module_name
+        if "." in temp_module_name:
+            temp_module_name = temp_module_name.split(".", 1)[0]
+        if get_path_in_common_overlay(
+            f"/usr/lib/inithooks/bin/{temp_module_name}.py"
+        ):
+            # file exists in an overlay from somewhere, so this lint is
+            # definitely incorrect
+            return
+
+    packaged_report = filter_packaged(report, packages[module_name])
+    if packaged_report:
+        yield packaged_report
+
+
 @register_filter
 class MissingModuleFilter(ReportFilter):
-    def filter(self, report: Report) -> Generator[Report, None, None]:
-        if (
-            report.source == "pylint"
-            and report.raw is not None
-            and report.raw["symbol"] == "import-error"
-        ):
-            match = MISSING_MODULE_RE.match(report.raw["message"])
-            assert match is not None
-            module_name = match.group(1)
-
-            if (
-                isinstance(report.item, FileItem)
-                and dirname(report.item.relpath)
-                == "overlay/usr/lib/inithooks/bin"
-            ):
-                temp_module_name = module_name
-                if "." in temp_module_name:
-                    temp_module_name = temp_module_name.split(".", 1)[0]
-                if get_path_in_common_overlay(
-                    f"/usr/lib/inithooks/bin/{temp_module_name}.py"
-                ):
-                    # file exists in an overlay from somewhere, so this lint is
-                    # definitely incorrect
-                    return None
-
-            packaged_report = filter_packaged(report, module_name)
-            if packaged_report:
-                yield packaged_report
-
-        else:
-            yield report
+    SOURCES: ClassVar[set[str]] = {"pylint"}
+    SYMBOLS: ClassVar[set[str]] = {"import-error"}
+
+    def __init__(self) -> None:
+        # packages providing each module looked up so far this run, reports
+        # arrive one item at a time and many items import the same modules
+        self._packages: dict[str, list[str]] = {}
+
+    def filter_batch(self, reports: list[Report]) -> list[list[Report]]:
+        # a single lookup for every module not seen before is much faster
+        # than one apt-file search per report
+        unknown = {
+            name
+            for name in map(missing_module_name, reports)
+            if name is not None and name not in self._packages
+        }
+        if unknown:
+            self._packages.update(find_python_packages_from_imports(unknown))
+        return [
+            list(filter_missing_module(report, self._packages))
+            for report in reports
+        ]
+
+    def filter(self, report: Report) -> Iterator[Report]:
+        yield from self.filter_batch([report])[0]
@@ -15,16 +15,176 @@
 # You should have received a copy of the GNU General Public License along with
 # tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
 import json
+import site
 import subprocess
+import sysconfig
+import warnings
 from collections.abc import Generator
+from logging import getLogger
 from os.path import abspath, dirname, join
 from typing import ClassVar
 
-from libtkldet.apt_file import is_in_path, is_installed
 from libtkldet.linter import FileItem, FileLinter, register_linter
-from libtkldet.report import FileReport, Report, parse_report_level
+from libtkldet.report import (
+    FailureReport,
+    FileReport,
+    Report,
+    parse_report_level,
+)
+from libtkldet.tools import get_tool, register_tool
+
+PYLINT = register_tool("pylint", "pylint")
+
+logger = getLogger(__name__)
+
+
+def run_pylint_subprocess(path: str, rcfile: str) -> list[dict] | None:
+    """
+    Run pylint on a single file in a new interpreter
+
+    Returns None if pylint output couldn't be parsed
+    """
+    ret = subprocess.run(
+        [
+            "/usr/bin/pylint",
+            path,
+            "-f",
+            "json",
+            "--rcfile",
+            rcfile,
+        ],
+        capture_output=True,
+        check=False,
+        text=True,
+    )
+    try:
+        return json.loads(ret.stdout)
+    except json.JSONDecodeError:
+        logger.debug("pylint failed: %s", ret.stderr)
+        return None
+
+
+def _environment_dirs() -> tuple[str, ...]:
+    """Directories of the stdlib and installed packages"""
+    paths = sysconfig.get_paths()
+    dirs = {paths[name] for name in ("stdlib", "platstdlib", "purelib", "platlib")}
+    dirs.update(site.getsitepackages())
+    dirs.add(site.getusersitepackages())
+    return tuple(dirs)
+
+
+class InProcessPylint:
+    """
+    Run pylint on files one at a time inside this interpreter
+
+    The linter (and astroid's cache of stdlib and installed modules) is
+    reused between files. Anything astroid found (or failed to find) outside
+    of those directories is forgotten after each file, it depends on the
+    directory of the checked file, so results are the same as running pylint
+    on each file separately.
+    """
+
+    def __init__(self, rcfile: str) -> None:
+        self.rcfile = rcfile
+        self._linter: PylintLinter | None = None
+        self._stable_dirs = _environment_dirs()
+
+    def _is_stable(self, path: str | None) -> bool:
+        return path is not None and path.startswith(self._stable_dirs)
+
+    def _forget_local_modules(self) -> None:
+        for name, module in list(MANAGER.astroid_cache.items()):
+            if module.file is not None and not self._is_stable(module.file):
+                del MANAGER.astroid_cache[name]
+        # values are module specs, or the exception raised when not found
+        for key, found in list(MANAGER._mod_file_cache.items()):
+            if not self._is_stable(getattr(found, "location", None)):
+                del MANAGER._mod_file_cache[key]
+        _find_spec.cache_clear()
+        for finder in _SPEC_FINDERS:
+            finder.find_module.cache_clear()
+
+    def check(self, path: str) -> list[dict]:
+        """
+        Run pylint on a single file
+
+        Returns messages in the same structure as pylint's json output format
+        """
+        reporter = CollectingReporter()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            try:
+                if self._linter is None:
+                    self._linter = Run(
+                        [path, "--rcfile", self.rcfile, "--jobs", "1"],
+                        reporter=reporter,
+                        exit=False,
+                    ).linter
+                else:
+                    self._linter.set_reporter(reporter)
+                    self._linter.check([path])
+            finally:
+                self._forget_local_modules()
+        for warning in caught:
+            logger.debug("pylint: %s", warning.message)
+        return [
+            {
+                "type": message.category,
+                "module": message.module,
+                "obj": message.obj,
+                "line": message.line,
+                "column": message.column,
+                "endLine": message.end_line,
+                "endColumn": message.end_column,
+                "path": message.path,
+                "symbol": message.symbol,
+                "message": message.msg or "",
+                "message-id": message.msg_id,
+            }
+            for message in reporter.messages
+        ]
+
+
+def pylint_report(item: FileItem, report: dict) -> Report:
+    """Convert a single pylint message into a report"""
+    if report["obj"]:
+        location_metadata = f'{report["obj"]} in module {report["module"]}'
+    else:
+        location_metadata = f'in base of module {report["module"]}'
+
+    return FileReport(
+        item=item,
+        line=report["line"],
+        column=report["column"],
+        location_metadata=location_metadata,
+        message="[{} | {}] {}".format(
+            report["message-id"],
+            report["symbol"],
+            report["message"],
+        ),
+        fix=None,
+        source="pylint",
+        raw=report,
+        level=parse_report_level(report["type"]),
+    )
+
+
+# ruff covers pylint's lints (much faster), so only use pylint without it
+if not get_tool("ruff").is_available() and PYLINT.is_available():
+    try:
+        from astroid import MANAGER
+        from astroid.interpreter._import.spec import (
+            _SPEC_FINDERS,
+            _find_spec,
+        )
+        from pylint.lint import PyLinter as PylintLinter
+        from pylint.lint import Run
+        from pylint.reporters import CollectingReporter
+    except ImportError:
+        IN_PROCESS = False
+    else:
+        IN_PROCESS = True
 
-if is_installed("pylint") and not is_in_path("ruff"):
     rcfile = join(dirname(dirname(abspath(__file__))), "pylint_rcfile")
 
     @register_linter
@@ -40,40 +200,38 @@ if is_installed("pylint") and not is_in_path("ruff"):
         }
         DISABLE_TAGS: ClassVar[set[str]] = set()
 
-        def check(self, item: FileItem) -> Generator[Report, None, None]:
-            for report in json.loads(
-                subprocess.run(
-                    [
-                        "/usr/bin/pylint",
-                        item.abspath,
-                        "-f",
-                        "json",
-                        "--rcfile",
-                        rcfile,
-                    ],
-                    capture_output=True,
-                    text=True,
-                ).stdout
-            ):
-                if report["obj"]:
-                    location_metadata = (
-                        f'{report["obj"]} in module {report["module"]}'
+        def __init__(self) -> None:
+            self._in_process = InProcessPylint(rcfile) if IN_PROCESS else None
+
+        def _run(self, path: str) -> list[dict] | None:
+            if self._in_process is not None:
+                try:
+                    return self._in_process.check(path)
+                except Exception:
+                    logger.warning(
+                        "in-process pylint failed, falling back to running"
+                        " pylint once per file",
+                        exc_info=True,
                     )
-                else:
-                    location_metadata = f'in base of module {report["module"]}'
+                    self._in_process = None
+            return run_pylint_subprocess(path, rcfile)
+
+        # no cache_key: results depend on installed packages and on modules
+        # next to the checked file, neither of which the cache can track
 
-                yield FileReport(
+        def check(self, item: FileItem) -> Generator[Report, None, None]:
+            output = self._run(item.abspath)
+            if output is None:
+                yield FailureReport(
                     item=item,
-                    line=report["line"],
-                    column=report["column"],
-                    location_metadata=location_metadata,
-                    message="[{} | {}] {}".format(
-                        report["message-id"],
-                        report["symbol"],
-                        report["message"],
-                    ),
+                    line=None,
+                    column=None,
+                    location_metadata=None,
+                    message="pylint failed to check file",
                     fix=None,
                     source="pylint",
-                    raw=report,
-                    level=parse_report_level(report["type"]),
+                    level=parse_report_level("error"),
                 )
+                return
+            for report in output:
+                yield pylint_report(item, report)
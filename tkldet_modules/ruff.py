@@ -21,12 +21,21 @@
 # ruff: noqa: E501, C408
 
 import json
+import os
 import subprocess
 from collections.abc import Generator
+from logging import getLogger
+from os.path import dirname, expanduser, join, realpath
 
-from libtkldet.apt_file import is_in_path
-from libtkldet.linter import FileItem, FileLinter, register_linter
-from libtkldet.report import FileReport, Report, parse_report_level
+from libtkldet.file_util import ancestors, chunk_arguments, config_files_key
+from libtkldet.linter import BatchFileLinter, FileItem, register_linter
+from libtkldet.report import (
+    FailureReport,
+    FileReport,
+    Report,
+    parse_report_level,
+)
+from libtkldet.tools import register_tool
 
 RUFF_LINTS = dict(
     pyflakes=dict(
@@ -1016,10 +1025,107 @@ RUFF_LINTS = dict(
     ),
 )
 
-if is_in_path("ruff"):
+RUFF = register_tool("ruff")
+
+RUFF_COMMAND = ["ruff", "check", "--select=ALL", "--output-format", "json"]
+
+RUFF_CONFIG_NAMES = ("pyproject.toml", "ruff.toml", ".ruff.toml")
+"files ruff may read configuration from"
+
+RUFF_USER_CONFIG_DIR = join(
+    os.getenv("XDG_CONFIG_HOME", expanduser("~/.config")), "ruff"
+)
+
+logger = getLogger(__name__)
+
+
+def run_ruff(paths: list[str]) -> list[dict] | None:
+    """Run ruff on paths, returns None if ruff output couldn't be parsed"""
+    ret = subprocess.run(
+        [*RUFF_COMMAND, *paths],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return json.loads(ret.stdout)
+    except json.JSONDecodeError:
+        logger.debug("ruff failed: %s", ret.stderr)
+        return None
+
+
+def ruff_config_key(path: str) -> str:
+    """
+    Identify ruff configuration files which may apply to file at path
+
+    ruff uses the closest configuration file to each file (or to the working
+    directory), falling back to the user's configuration, so the path, mtime
+    & size of every such file which exists is included
+    """
+    return config_files_key(
+        [
+            *ancestors(dirname(path)),
+            *ancestors(os.getcwd()),
+            RUFF_USER_CONFIG_DIR,
+        ],
+        RUFF_CONFIG_NAMES,
+    )
+
+
+def ruff_reports(
+    item: FileItem, report: dict
+) -> Generator[Report, None, None]:
+    """Convert a single ruff diagnostic into reports"""
+    location_metadata = ""
+
+    level = ""
+    lint_is_known = False
+    for group in RUFF_LINTS.values():
+        if report["code"] in group:
+            level = group[report["code"]]
+            lint_is_known = True
+            break
+
+    if level is None:
+        # none means the lint is suppressed
+        return
+
+    if not lint_is_known:
+        level = "error"
+
+    yield FileReport(
+        item=item,
+        line=report["location"]["row"],
+        column=report["location"]["column"],
+        location_metadata=location_metadata,
+        message="[{} | {}] {}".format(
+            report["code"],
+            "?",
+            report["message"],
+        ),
+        fix=None,
+        source="ruff",
+        raw=report,
+        level=parse_report_level(level),
+    )
+
+    if not lint_is_known:
+        yield FileReport(
+            item=item,
+            line=None,
+            column=None,
+            location_metadata=None,
+            message=f"found unknown lint: {report['code']}",
+            fix=None,
+            source="ruff",
+            raw=report,
+            level=parse_report_level("error"),
+        )
+
+
+if RUFF.is_available():
 
     @register_linter
-    class RuffLinter(FileLinter):
+    class RuffLinter(BatchFileLinter):
         ENABLE_TAGS: set[str] = {
             "ext:py",
             "shebang:/usr/bin/python",
@@ -1031,63 +1137,63 @@ if is_in_path("ruff"):
         }
         DISABLE_TAGS: set[str] = set()
 
-        def check(self, item: FileItem) -> Generator[Report, None, None]:
-            for report in json.loads(
-                subprocess.run(
-                    [
-                        "ruff",
-                        "check",
-                        "--select=ALL",
-                        "--output-format",
-                        "json",
-                        item.abspath,
-                    ],
-                    capture_output=True,
-                    text=True,
-                ).stdout
-            ):
-                location_metadata = ""
+        def cache_key(self) -> str:
+            return "\0".join(
+                [
+                    RUFF.version(),
+                    " ".join(RUFF_COMMAND),
+                    json.dumps(RUFF_LINTS, sort_keys=True),
+                ]
+            )
 
-                level = ""
-                lint_is_known = False
-                for group in RUFF_LINTS.values():
-                    if report["code"] in group:
-                        level = group[report["code"]]
-                        lint_is_known = True
-                        break
+        def item_cache_key(self, item: FileItem) -> str:
+            return ruff_config_key(item.abspath)
 
-                if level is None:
-                    # none means the lint is suppressed
-                    continue
+        def check_batch(
+            self, items: list[FileItem]
+        ) -> Generator[Report, None, None]:
+            paths = {item.abspath: item for item in items}
+            # ruff may report resolved paths, so also map those back
+            by_path = dict(paths)
+            for item in items:
+                by_path.setdefault(realpath(item.abspath), item)
 
-                if not lint_is_known:
-                    level = "error"
+            reserved = sum(len(arg) + 1 for arg in RUFF_COMMAND)
+            for chunk in chunk_arguments(list(paths), reserved):
+                yield from self.check_chunk(
+                    [paths[path] for path in chunk], by_path
+                )
 
-                yield FileReport(
-                    item=item,
-                    line=report["location"]["row"],
-                    column=report["location"]["column"],
-                    location_metadata=location_metadata,
-                    message="[{} | {}] {}".format(
-                        report["code"],
-                        "?",
-                        report["message"],
-                    ),
+        def check_chunk(
+            self, items: list[FileItem], by_path: dict[str, FileItem]
+        ) -> Generator[Report, None, None]:
+            output = run_ruff([item.abspath for item in items])
+            if output is None and len(items) > 1:
+                # something broke the whole run, check files one at a time so
+                # one bad file doesn't lose reports for all the others
+                for item in items:
+                    yield from self.check_chunk([item], by_path)
+                return
+            if output is None:
+                yield FailureReport(
+                    item=items[0],
+                    line=None,
+                    column=None,
+                    location_metadata=None,
+                    message="ruff failed to check file",
                     fix=None,
                     source="ruff",
-                    raw=report,
-                    level=parse_report_level(level),
+                    level=parse_report_level("error"),
                 )
-
-                if not lint_is_known:
-                    yield FileReport(
-                        item=item,
-                        line=None,
-                        column=None,
-                        location_metadata=None,
-                        message=f"found unknown lint: {report['code']}",
-                        fix=None,
-                        source="ruff",
-                        raw=report,
-                        level=parse_report_level("error"),
+                return
+            for report in output:
+                item = by_path.get(report["filename"]) or by_path.get(
+                    realpath(report["filename"])
+                )
+                if item is None:
+                    logger.warning(
+                        "ruff report for unexpected file %r",
+                        report["filename"],
                     )
+                    continue
+                yield from ruff_reports(item, report)
@@ -15,19 +15,52 @@
 # You should have received a copy of the GNU General Public License along with
 # tkldev-detective. If not, see <https://www.gnu.org/licenses/>.
 import json
+import os
 import subprocess
 from collections.abc import Generator
+from logging import getLogger
+from os.path import dirname, expanduser
 
-from libtkldet.apt_file import is_installed
-from libtkldet.linter import FileItem, FileLinter, register_linter
+from libtkldet.file_cache import get_content
+from libtkldet.file_util import ancestors, chunk_arguments, config_files_key
+from libtkldet.linter import BatchFileLinter, FileItem, register_linter
 from libtkldet.report import (
+    FailureReport,
     FileReport,
     Replacement,
     Report,
     parse_report_level,
 )
+from libtkldet.tools import register_tool
 
-if is_installed("shellcheck"):
+SHELLCHECK = register_tool("shellcheck", "shellcheck")
+
+SHELLCHECK_COMMAND = ["shellcheck", "-f", "json1"]
+
+SHELLCHECK_CONFIG_NAMES = (".shellcheckrc", "shellcheckrc")
+
+logger = getLogger(__name__)
+
+
+def shellcheck_config_key(path: str) -> str:
+    """
+    Identify shellcheck rcfiles which may apply to file at path
+
+    shellcheck uses the closest rcfile to each file, falling back to the
+    user's rcfile, so the path, mtime & size of every such file which exists
+    is included
+    """
+    return config_files_key(
+        [
+            *ancestors(dirname(path)),
+            expanduser("~"),
+            os.getenv("XDG_CONFIG_HOME", expanduser("~/.config")),
+        ],
+        SHELLCHECK_CONFIG_NAMES,
+    )
+
+
+if SHELLCHECK.is_available():
 
     def insert_str(v: str, i: int, instr: str) -> str:
         return v[:i] + instr + v[i:]
@@ -48,12 +81,11 @@ if is_installed("shellcheck"):
         start_line -= 1
         end_line -= 1
 
+        content = get_content(path)
         lines = []
-
-        with open(path, "r") as fob:
-            for i, line in enumerate(fob):
-                if i >= start_line and i <= end_line:
-                    lines.append(line)
+        if content is not None:
+            end = min(end_line + 1, content.line_count)
+            lines = [content.line(i) for i in range(start_line, end)]
 
         for replacement in replacements:
             assert replacement["insertionPoint"] in ("beforeStart", "afterEnd")
@@ -73,10 +105,63 @@ if is_installed("shellcheck"):
                     replacement["replacement"],
                 )
 
-        return Replacement(start_line, end_line, expand_lines(lines))
+        return Replacement(start_line, end_line, list(expand_lines(lines)))
+
+    def run_shellcheck(paths: list[str]) -> list[dict] | None:
+        """
+        Run shellcheck on paths
+
+        Returns comments for all files, or None if output couldn't be parsed
+        """
+        ret = subprocess.run(
+            [*SHELLCHECK_COMMAND, *paths],
+            capture_output=True,
+            text=True,
+        )
+        try:
+            return json.loads(ret.stdout)["comments"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            logger.debug("shellcheck failed: %s", ret.stderr)
+            return None
+
+    def shellcheck_report(item: FileItem, report: dict) -> Report:
+        """Convert a single shellcheck comment into a report"""
+        if report["column"] == report["endColumn"]:
+            column = None
+        else:
+            column = (report["column"], report["endColumn"] - 1)
+
+        if report["line"] == report["endLine"]:
+            line = report["line"]
+        else:
+            line = (report["line"], report["endLine"])
+
+        fix = report["fix"]
+        if isinstance(report["fix"], dict):
+            fix = format_replacement(
+                item.abspath,
+                (report["line"], report["endLine"]),
+                (report["column"], report["endColumn"]),
+                fix["replacements"],
+            )
+
+        return FileReport(
+            item=item,
+            line=line,
+            column=column,
+            location_metadata="",
+            message="[{}] {}".format(
+                report["code"],
+                report["message"],
+            ),
+            fix=fix,
+            source="shellcheck",
+            raw=report,
+            level=parse_report_level(report["level"]),
+        )
 
     @register_linter
-    class Shellcheck(FileLinter):
+    class Shellcheck(BatchFileLinter):
         ENABLE_TAGS: set[str] = {
             "ext:sh",
             "ext:bash",
@@ -85,43 +170,56 @@ if is_installed("shellcheck"):
         }
         DISABLE_TAGS: set[str] = set()
 
-        def check(self, item: FileItem) -> Generator[Report, None, None]:
-            for report in json.loads(
-                subprocess.run(
-                    ["shellcheck", item.abspath, "-f", "json"],
-                    capture_output=True,
-                    text=True,
-                ).stdout
-            ):
-                if report["column"] == report["endColumn"]:
-                    column = None
-                else:
-                    column = (report["column"], report["endColumn"] - 1)
-
-                if report["line"] == report["endLine"]:
-                    line = report["line"]
-                else:
-                    line = (report["line"], report["endLine"])
-
-                fix = report["fix"]
-                if isinstance(report["fix"], dict):
-                    fix = format_replacement(
-                        item.abspath,
-                        (report["line"], report["endLine"]),
-                        (report["column"], report["endColumn"]),
-                        fix["replacements"],
-                    )
-
-                yield FileReport(
-                    item=item,
-                    line=line,
-                    column=column,
-                    location_metadata="",
-                    message="[{}] {}".format(
-                        report["code"],
-                        report["message"],
-                    ),
-                    fix=fix,
+        def cache_key(self) -> str:
+            return "\0".join(
+                [
+                    SHELLCHECK.version(),
+                    " ".join(SHELLCHECK_COMMAND),
+                ]
+            )
+
+        def item_cache_key(self, item: FileItem) -> str:
+            return shellcheck_config_key(item.abspath)
+
+        def check_batch(
+            self, items: list[FileItem]
+        ) -> Generator[Report, None, None]:
+            paths = {item.abspath: item for item in items}
+            reserved = sum(len(arg) + 1 for arg in SHELLCHECK_COMMAND)
+            for chunk in chunk_arguments(list(paths), reserved):
+                yield from self.check_chunk([paths[path] for path in chunk])
+
+        def check_chunk(
+            self, items: list[FileItem]
+        ) -> Generator[Report, None, None]:
+            comments = run_shellcheck([item.abspath for item in items])
+            if comments is None and len(items) > 1:
+                # something broke the whole run, check files one at a time so
+                # one bad file doesn't lose reports for all the others
+                for item in items:
+                    yield from self.check_chunk([item])
+                return
+            if comments is None:
+                yield FailureReport(
+                    item=items[0],
+                    line=None,
+                    column=None,
+                    location_metadata=None,
+                    message="shellcheck failed to check file",
+                    fix=None,
                     source="shellcheck",
-                    level=parse_report_level(report["level"]),
+                    level=parse_report_level("error"),
                 )
+                return
+
+            # json1 labels each comment with the path exactly as given
+            by_path = {item.abspath: item for item in items}
+            for report in comments:
+                item = by_path.get(report["file"])
+                if item is None:
+                    logger.warning(
+                        "shellcheck report for unexpected file %r",
+                        report["file"],
+                    )
+                    continue
+                yield shellcheck_report(item, report)
@@ -31,34 +31,36 @@ class YamlLinter(FileLinter):
     DISABLE_TAGS: set[str] = set()
 
     def check(self, item: FileItem) -> Generator[Report, None, None]:
-        with open(item.abspath, "r") as fob:
-            try:
-                yaml.safe_load(fob)
-            except yaml.constructor.ConstructorError:
-                # ignore tags and other fancy stuff we can't easily check
-                pass
-            except yaml.parser.ParserError as e:
-                yield FileReport(
-                    item=item,
-                    line=e.problem_mark.line,
-                    column=e.problem_mark.column,
-                    location_metadata=None,
-                    message=f"{e.context} {e.problem}",
-                    fix=None,
-                    source="yaml_check",
-                    level=ReportLevel.ERROR,
-                )
-            except yaml.scanner.ScannerError as e:
-                yield FileReport(
-                    item=item,
-                    line=e.problem_mark.line,
-                    column=e.problem_mark.column,
-                    location_metadata=None,
-                    message=f"{e.context} {e.problem}",
-                    fix=None,
-                    source="yaml_check",
-                    level=ReportLevel.ERROR,
-                )
+        content = item.content
+        if content is None:
+            return
+        try:
+            yaml.safe_load(content.text)
+        except yaml.constructor.ConstructorError:
+            # ignore tags and other fancy stuff we can't easily check
+            pass
+        except yaml.parser.ParserError as e:
+            yield FileReport(
+                item=item,
+                line=e.problem_mark.line,
+                column=e.problem_mark.column,
+                location_metadata=None,
+                message=f"{e.context} {e.problem}",
+                fix=None,
+                source="yaml_check",
+                level=ReportLevel.ERROR,
+            )
+        except yaml.scanner.ScannerError as e:
+            yield FileReport(
+                item=item,
+                line=e.problem_mark.line,
+                column=e.problem_mark.column,
+                location_metadata=None,
+                message=f"{e.context} {e.problem}",
+                fix=None,
+                source="yaml_check",
+                level=ReportLevel.ERROR,
+            )
 
 
 if YAML: